@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.models import User
+
+VERSION_KEY = 'api:token_version:{}'
+USER_KEY = 'api:user:{}'
+# Версия для удаленных и заблокированных пользователей.
+REVOKED = -1
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя из кэша или БД.
+
+    Без общего кэша (SHARED_CACHE) forget_user сбросил бы только кэш
+    воркера, обработавшего запись, поэтому версия читается из БД.
+    """
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key) if settings.SHARED_CACHE else None
+    if version is None:
+        row = User.objects.filter(pk=user_id).values_list(
+            'token_version', 'is_active').first()
+        version = row[0] if row and row[1] else REVOKED
+        if settings.SHARED_CACHE:
+            cache.set(key, version, settings.STATELESS_JWT['CACHE_TIMEOUT'])
+    return version
+
+
+def forget_user(user_id):
+    cache.delete_many([VERSION_KEY.format(user_id), USER_KEY.format(user_id)])
+
+
+def get_full_user(user):
+    """Полная модель пользователя, если в запросе только данные токена"""
+    if not getattr(user, 'is_from_token', False):
+        return user
+    if not settings.SHARED_CACHE:
+        return User.objects.get(pk=user.pk)
+    key = USER_KEY.format(user.pk)
+    full_user = cache.get(key)
+    if full_user is None:
+        full_user = User.objects.get(pk=user.pk)
+        cache.set(key, full_user, settings.STATELESS_JWT['CACHE_TIMEOUT'])
+    return full_user
+
+
+def user_from_claims(token):
+    """Пользователь, собранный из проверенного токена без запроса к БД.
+
+    Подходит для проверки прав и как значение внешнего ключа; остальные
+    поля не заполнены, за ними нужно идти в ``get_full_user``.
+    """
+    user = User(
+        pk=token[api_settings.USER_ID_CLAIM],
+        username=token['username'],
+        role=token['role'],
+        is_superuser=token.get('is_superuser', False),
+        token_version=token['ver'],
+    )
+    user._state.adding = False
+    user._state.db = 'default'
+    user.is_from_token = True
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без чтения пользователя из БД на каждый запрос.
+
+    Роль и имя берутся из claims. Токен отзывается увеличением
+    ``User.token_version``: версия из claim ``ver`` сверяется с
+    закэшированной на ``STATELESS_JWT['CACHE_TIMEOUT']`` секунд, а без
+    общего кэша - с прочитанной из БД одной колонкой.
+    Токены без этих claims проверяются по БД, как раньше.
+    """
+
+    def get_user(self, validated_token):
+        if 'role' not in validated_token or 'ver' not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user '
+                               'identification')
+        if validated_token['ver'] != get_token_version(user_id):
+            raise AuthenticationFailed('Токен отозван', code='token_revoked')
+        return user_from_claims(validated_token)
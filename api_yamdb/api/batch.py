@@ -0,0 +1,232 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, connections, transaction
+from django.db.models import prefetch_related_objects
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
+
+from api import permissions
+from api.relations import resolve_batch_slugs
+from api.signals import invalidate_model
+
+NOT_SAVED = 'Объект не сохранен: нарушено ограничение базы данных'
+
+
+def bulk_create_objects(model, items):
+    """Вставка объектов и их связей многие-ко-многим пачками"""
+    m2m_fields = model._meta.many_to_many
+    objects, related = [], []
+    for data in items:
+        data = dict(data)
+        related.append({
+            field.name: data.pop(field.name)
+            for field in m2m_fields if field.name in data
+        })
+        objects.append(model(**data))
+    model.objects.bulk_create(objects)
+    for field in m2m_fields:
+        through = field.remote_field.through
+        source = through._meta.get_field(field.m2m_field_name()).attname
+        target = through._meta.get_field(
+            field.m2m_reverse_field_name()).attname
+        through.objects.bulk_create(
+            through(**{source: obj.pk, target: value.pk})
+            for obj, values in zip(objects, related)
+            for value in values.get(field.name, ())
+        )
+    if m2m_fields:
+        prefetch_related_objects(
+            objects, *(field.name for field in m2m_fields))
+    return objects
+
+
+def pop_unique_validators(serializer):
+    """UniqueValidator полей: уникальность пачки проверяется одним запросом"""
+    unique = {}
+    for name, field in serializer.fields.items():
+        validators = [
+            validator for validator in field.validators
+            if isinstance(validator, UniqueValidator)
+        ]
+        if validators:
+            unique[name] = (field.source, validators[0])
+            field.validators = [
+                validator for validator in field.validators
+                if validator not in validators
+            ]
+    return unique
+
+
+class BatchWriteMixin:
+    """Пачечное создание (POST) и изменение (PATCH) по адресу batch/.
+
+    Каждый элемент проверяет сериализатор вьюсета, но слаги связей и
+    уникальность полей проверяются одним запросом на всю пачку. Новые
+    объекты вставляются через bulk_create, если СУБД возвращает id
+    вставленных строк, иначе по одному; запись идет в одной транзакции.
+    В ответе - результат каждого элемента в порядке запроса.
+
+    bulk_create не отправляет post_save и m2m_changed: кэши api сбрасывает
+    invalidate_model, а таблицы лидеров и дату изменения по жанрам
+    (reviews.signals) новым произведениям без отзывов обновлять не нужно.
+    """
+    batch_lookup_field = 'id'
+
+    @classmethod
+    def batch_view(cls):
+        return cls.as_view(
+            {'post': 'batch_create', 'patch': 'batch_update'},
+            permission_classes=(permissions.Admin,),
+        )
+
+    def get_batch_items(self):
+        items = self.request.data
+        limit = settings.BATCH_WRITE['MAX_ITEMS']
+        if not isinstance(items, list) or not items:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Ожидается непустой список объектов']})
+        if len(items) > limit:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Не больше {limit} объектов за запрос']})
+        return items
+
+    def batch_create(self, request, *args, **kwargs):
+        items = self.get_batch_items()
+        serializers = [self.get_serializer(data=item) for item in items]
+        errors = self.validate_batch(serializers, items)
+        valid = [
+            index for index, error in enumerate(errors) if error is None
+        ]
+        if valid and self.can_bulk_create():
+            try:
+                with transaction.atomic():
+                    objects = bulk_create_objects(
+                        self.get_queryset().model,
+                        [serializers[index].validated_data
+                         for index in valid])
+            except IntegrityError:
+                self.save_each(serializers, valid, errors)
+            else:
+                for index, obj in zip(valid, objects):
+                    serializers[index].instance = obj
+                invalidate_model(self.get_queryset().model)
+        else:
+            self.save_each(serializers, valid, errors)
+        return self.batch_response(
+            serializers, errors, status.HTTP_201_CREATED)
+
+    def batch_update(self, request, *args, **kwargs):
+        items = self.get_batch_items()
+        instances = self.get_batch_instances(items)
+        serializers = [
+            self.get_serializer(instance, data=item, partial=True)
+            for instance, item in zip(instances, items)
+        ]
+        not_found = {
+            index for index, instance in enumerate(instances)
+            if instance is None
+        }
+        errors = [
+            {self.batch_lookup_field: ['Объект не найден']}
+            if index in not_found else None
+            for index in range(len(items))
+        ]
+        errors = self.validate_batch(serializers, items, errors)
+        self.save_each(
+            serializers,
+            [index for index, error in enumerate(errors) if error is None],
+            errors,
+        )
+        return self.batch_response(
+            serializers, errors, status.HTTP_200_OK, not_found)
+
+    def get_batch_instances(self, items):
+        """Изменяемые объекты по batch_lookup_field одним запросом"""
+        field = self.get_queryset().model._meta.get_field(
+            self.batch_lookup_field)
+        lookups = []
+        for item in items:
+            try:
+                lookups.append(field.to_python(
+                    item.get(self.batch_lookup_field)
+                    if isinstance(item, dict) else None))
+            except DjangoValidationError:
+                lookups.append(None)
+        found = self.get_queryset().in_bulk(
+            {lookup for lookup in lookups if lookup is not None},
+            field_name=self.batch_lookup_field,
+        )
+        return [found.get(lookup) for lookup in lookups]
+
+    def validate_batch(self, serializers, items, errors=None):
+        """Ошибки элементов пачки, None - элемент прошел проверку"""
+        errors = errors or [None] * len(serializers)
+        resolve_batch_slugs(serializers[0], items)
+        unique = {}
+        for index, serializer in enumerate(serializers):
+            unique = pop_unique_validators(serializer)
+            if errors[index] is None and not serializer.is_valid():
+                errors[index] = serializer.errors
+        for name, (source, validator) in unique.items():
+            self.check_unique(serializers, errors, name, source, validator)
+        return errors
+
+    def check_unique(self, serializers, errors, name, source, validator):
+        positions = {}
+        for index, serializer in enumerate(serializers):
+            if errors[index] is not None:
+                continue
+            value = serializer.validated_data.get(source)
+            if value is None or (
+                serializer.instance is not None
+                and getattr(serializer.instance, source) == value
+            ):
+                continue
+            positions.setdefault(value, []).append(index)
+        if not positions:
+            return
+        existing = set(validator.queryset.filter(
+            **{f'{source}__in': list(positions)}
+        ).values_list(source, flat=True))
+        for value, indexes in positions.items():
+            # Повтор внутри пачки - ошибка у всех, кроме первого.
+            taken = indexes if value in existing else indexes[1:]
+            for index in taken:
+                errors[index] = {name: [str(validator.message)]}
+
+    def save_each(self, serializers, indexes, errors):
+        """Сохранение по одному, ошибка одного не отменяет остальные"""
+        with transaction.atomic():
+            for index in indexes:
+                try:
+                    with transaction.atomic():
+                        serializers[index].save()
+                except IntegrityError:
+                    errors[index] = {
+                        api_settings.NON_FIELD_ERRORS_KEY: [NOT_SAVED]}
+
+    def can_bulk_create(self):
+        connection = connections[self.get_queryset().db]
+        return connection.features.can_return_ids_from_bulk_insert
+
+    def batch_response(self, serializers, errors, success_status,
+                       not_found=()):
+        results = []
+        for index, (serializer, error) in enumerate(zip(serializers, errors)):
+            if error is None:
+                results.append(
+                    {'status': success_status, 'data': serializer.data})
+                continue
+            results.append({
+                'status': (
+                    status.HTTP_404_NOT_FOUND if index in not_found
+                    else status.HTTP_400_BAD_REQUEST
+                ),
+                'errors': error,
+            })
+        if any(error is not None for error in errors):
+            return Response(results, status=status.HTTP_207_MULTI_STATUS)
+        return Response(results, status=success_status)
@@ -0,0 +1,68 @@
+import json
+import math
+import platform
+import subprocess
+import time
+
+from django.db import connection
+
+
+def percentile(values, fraction):
+    """Перцентиль по методу ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarize(latencies):
+    """Сводка задержек в миллисекундах"""
+    milliseconds = [latency * 1000 for latency in latencies]
+    return {
+        'count': len(milliseconds),
+        'mean_ms': sum(milliseconds) / len(milliseconds) if milliseconds
+        else 0.0,
+        'p50_ms': percentile(milliseconds, 0.50),
+        'p90_ms': percentile(milliseconds, 0.90),
+        'p99_ms': percentile(milliseconds, 0.99),
+        'max_ms': max(milliseconds, default=0.0),
+    }
+
+
+def get_commit():
+    """Текущий коммит git, если код запущен из репозитория"""
+    try:
+        output = subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, check=True, text=True, timeout=5,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.strip() or None
+
+
+def write_results(path, suite, results, **meta):
+    """Сохранение результатов в JSON для сравнения между коммитами"""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({
+            'suite': suite,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'commit': get_commit(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            **meta,
+            'results': results,
+        }, file, ensure_ascii=False, indent=2)
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def change(before, after):
+    """Изменение в процентах, положительное - стало больше"""
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
@@ -0,0 +1,106 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from api import metrics
+
+GENERATION_KEY = 'api:generation:{}'
+STATS_KEY = 'api:response_cache:{}'
+
+
+def get_generation(label):
+    """Текущее поколение данных модели для ключей кэша"""
+    key = GENERATION_KEY.format(label)
+    generation = cache.get(key)
+    if generation is None:
+        # Начальное значение от времени, чтобы после вытеснения ключа
+        # не вернуться к поколению, под которым уже лежат старые данные.
+        cache.add(key, int(time.time() * 1000), None)
+        return cache.get(key)
+    return generation
+
+
+def bump_generation(*labels):
+    """Инвалидация всех ключей, построенных на поколении моделей"""
+    for label in labels:
+        try:
+            cache.incr(GENERATION_KEY.format(label))
+        except ValueError:
+            get_generation(label)
+
+
+def _increment(name):
+    key = STATS_KEY.format(name)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None)
+
+
+def get_response_cache_stats():
+    """Счетчики попаданий и промахов кэша ответов"""
+    hits = cache.get(STATS_KEY.format('hits'), 0)
+    misses = cache.get(STATS_KEY.format('misses'), 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+class CachedResponseMixin:
+    """Кэш ответов GET для list и retrieve.
+
+    Ключ строится из адреса, нормализованных параметров запроса и
+    поколений пространства имен ``cache_namespace``: списки зависят от
+    ``<namespace>``, объект — от ``<namespace>:all`` и ``<namespace>:<pk>``.
+    Поколения сдвигаются сигналами из ``api.signals``.
+    """
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().list, [self.cache_namespace], request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        namespaces = [
+            f'{self.cache_namespace}:all',
+            f'{self.cache_namespace}:{lookup}',
+        ]
+        return self.cached_response(
+            super().retrieve, namespaces, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request, namespaces):
+        params = sorted(
+            (name, value)
+            for name, values in request.query_params.lists()
+            for value in values
+        )
+        generations = [get_generation(name) for name in namespaces]
+        raw = f'{request.get_host()}{request.path}{params!r}{generations!r}'
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'api:response:{self.cache_namespace}:{digest}'
+
+    def cached_response(self, handler, namespaces, request, *args, **kwargs):
+        options = settings.API_RESPONSE_CACHE
+        if not options['ENABLED'] or self.cache_namespace is None:
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request, namespaces)
+        data = cache.get(key)
+        if data is not None:
+            _increment('hits')
+            metrics.RESPONSE_CACHE.labels(self.cache_namespace, 'hit').inc()
+            return Response(data, headers={'X-Cache': 'HIT'})
+        _increment('misses')
+        metrics.RESPONSE_CACHE.labels(self.cache_namespace, 'miss').inc()
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, options['TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,105 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_generation
+
+
+def get_modified_label(model):
+    """Поколение, которое сдвигается при любом изменении строк модели"""
+    return f'modified:{model._meta.label_lower}'
+
+
+def get_validators(queryset):
+    """Дата последнего изменения, количество строк и поколение модели.
+
+    Удаление строки не сдвигает максимум updated_at, но меняет
+    количество, а изменения вложенных данных без своего updated_at (имя
+    автора отзыва) сдвигают поколение, поэтому в ETag входят все три
+    значения. Агрегат кэшируется до изменения модели (см. api.signals).
+    """
+    label = get_modified_label(queryset.model)
+    generation = get_generation(label)
+    queryset = queryset.order_by()
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None, 0, generation
+    digest = hashlib.md5(f'{sql}{params!r}'.encode()).hexdigest()
+    key = f'api:validators:{label}:{generation}:{digest}'
+    validators = cache.get(key)
+    if validators is None:
+        data = queryset.aggregate(
+            modified=Max('updated_at'), count=Count('pk'))
+        validators = data['modified'], data['count']
+        cache.set(key, validators, settings.CONDITIONAL_GET['CACHE_TIMEOUT'])
+    return (*validators, generation)
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для list и retrieve без сериализации ответа.
+
+    Валидаторы считаются по отфильтрованному queryset до основного
+    запроса: совпавший If-None-Match сразу получает 304. В
+    ``conditional_dependencies`` - модели, данные которых вложены в ответ,
+    например жанры и категория произведения.
+
+    Last-Modified отдается для сведения, If-Modified-Since не учитывается:
+    удаление строки и смена имени автора не сдвигают updated_at.
+    """
+    conditional_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        if not settings.CONDITIONAL_GET['ENABLED']:
+            return super().list(request, *args, **kwargs)
+        validators = get_validators(self.filter_queryset(self.get_queryset()))
+        return self.conditional_response(
+            super().list, validators, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.CONDITIONAL_GET['ENABLED']:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        validators = get_validators(self.filter_queryset(
+            self.get_queryset()
+        ).filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}))
+        if not validators[1]:
+            # Объекта нет: 404 отдаст retrieve.
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            super().retrieve, validators, request, *args, **kwargs)
+
+    def get_etag(self, request, validators):
+        params = sorted(
+            (name, value)
+            for name, values in request.query_params.lists()
+            for value in values
+        )
+        raw = (f'{request.path}{params!r}{request.accepted_media_type}'
+               f'{validators!r}')
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def conditional_response(self, handler, validators, request,
+                             *args, **kwargs):
+        validators = [validators]
+        validators.extend(
+            get_validators(model.objects.all())
+            for model in self.conditional_dependencies
+        )
+        etag = self.get_etag(request, validators)
+        dates = [modified for modified, _, _ in validators if modified]
+        last_modified = int(max(dates).timestamp()) if dates else None
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
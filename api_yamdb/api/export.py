@@ -0,0 +1,80 @@
+import csv
+import datetime
+import io
+import json
+from itertools import chain
+
+from django.conf import settings
+
+from api.management.commands.install_bd import batches
+from reviews.models import Categories, Comment, Genre, Review, Title, User
+
+NDJSON, CSV = 'ndjson', 'csv'
+
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson; charset=utf-8',
+    CSV: 'text/csv; charset=utf-8',
+}
+
+# Файлы в порядке загрузки install_bd и их колонки. Внешний ключ
+# выгружается как id, под тем же именем колонки, что читает install_bd.
+EXPORT_FILES = {
+    'users': (User, ('id', 'username', 'email', 'role', 'bio',
+                     'first_name', 'last_name')),
+    'category': (Categories, ('id', 'name', 'slug')),
+    'genre': (Genre, ('id', 'name', 'slug')),
+    'titles': (Title, ('id', 'name', 'year', 'description', 'category')),
+    'genre_title': (Title.genre.through, ('id', 'title_id', 'genre_id')),
+    'review': (Review, ('id', 'title_id', 'text', 'author', 'score',
+                        'pub_date')),
+    'comments': (Comment, ('id', 'review_id', 'text', 'author',
+                           'pub_date')),
+}
+
+
+def export_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def export_rows(name, chunk_size):
+    """Строки файла пачками по chunk_size.
+
+    iterator() читает серверным курсором, поэтому память не зависит
+    от размера таблицы.
+    """
+    model, columns = EXPORT_FILES[name]
+    rows = model.objects.order_by('pk').values_list(*columns).iterator(
+        chunk_size=chunk_size)
+    for batch in batches(rows, chunk_size):
+        yield [[export_value(value) for value in row] for row in batch]
+
+
+def iter_csv(name, chunk_size=None):
+    """Файл name в формате install_bd по частям"""
+    chunk_size = chunk_size or settings.EXPORT['CHUNK_SIZE']
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header = [EXPORT_FILES[name][1]]
+    for rows in chain([header], export_rows(name, chunk_size)):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def iter_ndjson(names=None, chunk_size=None):
+    """Строки файлов names как JSON по строке на объект.
+
+    Ключи объекта - колонки CSV и ``file`` с именем файла.
+    """
+    chunk_size = chunk_size or settings.EXPORT['CHUNK_SIZE']
+    for name in names or EXPORT_FILES:
+        columns = ('file', *EXPORT_FILES[name][1])
+        for rows in export_rows(name, chunk_size):
+            yield ''.join(
+                json.dumps(dict(zip(columns, (name, *row))),
+                           ensure_ascii=False) + '\n'
+                for row in rows
+            )
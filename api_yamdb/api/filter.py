@@ -1,17 +1,92 @@
+import re
+
+from django.db.models import Count
 from django_filters import filters, FilterSet
+from rest_framework.exceptions import ValidationError
+
+from api.search import search_titles
+from reviews.models import Categories, Genre, Title
+
+MATCH_ANY, MATCH_ALL = 'any', 'all'
+# Сколько произведений можно запросить по ?ids= за раз.
+MAX_IDS = 100
+# id из цифр ASCII, не длиннее bigint: str.isdigit пропускает и '²'.
+ID_RE = re.compile('[0-9]{1,18}')
 
-from reviews.models import Title
+
+def split_csv(value):
+    """Значения параметра вида rock,jazz без пустых и повторов"""
+    return list(dict.fromkeys(
+        item.strip() for item in value.split(',') if item.strip()
+    ))
 
 
 class TitlesFilters(FilterSet):
     """Фильтр сортировки"""
-    genre = filters.CharFilter(field_name='genre__slug',
-                               lookup_expr='icontains')
-    category = filters.CharFilter(field_name='category__slug',
-                                  lookup_expr='icontains')
+    ids = filters.CharFilter(method='filter_ids')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_match = filters.ChoiceFilter(
+        choices=((MATCH_ANY, MATCH_ANY), (MATCH_ALL, MATCH_ALL)),
+        method='filter_nothing',
+    )
+    category = filters.CharFilter(method='filter_category')
     name = filters.CharFilter(field_name='name',
                               lookup_expr='icontains')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ['category', 'genre', 'name', 'year']
+        fields = ['ids', 'category', 'genre', 'name', 'year', 'search']
+
+    def filter_queryset(self, queryset):
+        """Пустой ?ids= фильтры пропускают, а список без пагинации - нет"""
+        if 'ids' in self.data and not split_csv(self.data['ids']):
+            self.fail_ids('ids')
+        return super().filter_queryset(queryset)
+
+    def filter_ids(self, queryset, name, value):
+        """Произведения по списку id: ?ids=1,2,3"""
+        ids = split_csv(value)
+        if not ids or len(ids) > MAX_IDS or not all(
+            ID_RE.fullmatch(pk) for pk in ids
+        ):
+            self.fail_ids(name)
+        return queryset.filter(pk__in=ids)
+
+    def fail_ids(self, name):
+        raise ValidationError(
+            {name: [f'Ожидается от 1 до {MAX_IDS} id через запятую']})
+
+    def filter_nothing(self, queryset, name, value):
+        """Параметр только уточняет другой фильтр"""
+        return queryset
+
+    def filter_genre(self, queryset, name, value):
+        """Точное совпадение слагов по таблице связи без JOIN:
+        any - хотя бы один из жанров, all - все жанры сразу"""
+        slugs = split_csv(value)
+        ids = list(
+            Genre.objects.filter(slug__in=slugs).values_list('id', flat=True)
+        )
+        match = self.form.cleaned_data.get('genre_match') or MATCH_ANY
+        if not ids or (match == MATCH_ALL and len(ids) < len(slugs)):
+            return queryset.none()
+        titles = Title.genre.through.objects.filter(genre_id__in=ids)
+        if match == MATCH_ALL and len(ids) > 1:
+            titles = titles.values('title_id').annotate(
+                matched=Count('genre_id')).filter(matched=len(ids))
+        return queryset.filter(pk__in=titles.values('title_id'))
+
+    def filter_category(self, queryset, name, value):
+        """Точное совпадение любого из слагов категорий"""
+        ids = list(Categories.objects.filter(
+            slug__in=split_csv(value)).values_list('id', flat=True))
+        if not ids:
+            return queryset.none()
+        return queryset.filter(category_id__in=ids)
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск с сортировкой по релевантности"""
+        return search_titles(queryset, value)
@@ -0,0 +1,103 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+from api.benchmarks import write_results
+from api.management.commands.bench_endpoints import BENCH_ADMIN
+from api.serializers import UserTokenObtainPairSerializer
+from reviews.models import Categories, Genre, User
+
+
+class Command(BaseCommand):
+    help = ('Пропускная способность создания произведений по одному '
+            'и через titles/batch/ на текущих данных (см. generate_dataset). '
+            'Созданные объекты откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items', type=int, default=1000,
+            help='Количество создаваемых произведений',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, action='append', dest='batch_sizes',
+            help='Размер пачки, можно указать несколько раз',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора для воспроизводимости',
+        )
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON',
+        )
+
+    def handle(self, *args, **options):
+        genres = list(Genre.objects.values_list('slug', flat=True)[:50])
+        categories = list(
+            Categories.objects.values_list('slug', flat=True)[:10])
+        if not genres or not categories:
+            raise CommandError(
+                'Нет данных для замера, выполните generate_dataset')
+        rand = random.Random(options['seed'])
+        items = [
+            {
+                'name': f'Пачка {number}',
+                'year': rand.randint(1900, 2000),
+                'description': 'Произведение для замера',
+                'category': rand.choice(categories),
+                'genre': rand.sample(genres, min(3, len(genres))),
+            }
+            for number in range(options['items'])
+        ]
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {self.get_token()}')
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            results['single'] = self.measure(
+                client, '/api/v1/titles/', [[item] for item in items],
+                single=True)
+            for size in options['batch_sizes'] or [100, 1000]:
+                chunks = [
+                    items[start:start + size]
+                    for start in range(0, len(items), size)
+                ]
+                results[f'batch_{size}'] = self.measure(
+                    client, '/api/v1/titles/batch/', chunks)
+        for name, stats in results.items():
+            self.stdout.write(
+                f'{name}: {stats["items_per_second"]:.0f} объектов/с, '
+                f'{stats["requests"]} запросов, {stats["seconds"]:.2f} с'
+            )
+        if options['output']:
+            write_results(
+                options['output'], 'batch', results, items=options['items'])
+
+    def get_token(self):
+        user, _ = User.objects.get_or_create(
+            username=BENCH_ADMIN,
+            defaults={'email': f'{BENCH_ADMIN}@example.com',
+                      'role': User.ADMIN, 'password': '!'},
+        )
+        return UserTokenObtainPairSerializer.get_token(user)['token']
+
+    def measure(self, client, path, chunks, single=False):
+        """Время создания всех объектов; в конце транзакция откатывается"""
+        with transaction.atomic():
+            started = time.perf_counter()
+            for chunk in chunks:
+                data = chunk[0] if single else chunk
+                response = client.post(
+                    path, data, content_type='application/json')
+                if response.status_code != 201:
+                    raise CommandError(
+                        f'{path}: ответ {response.status_code}')
+            seconds = time.perf_counter() - started
+            transaction.set_rollback(True)
+        count = sum(len(chunk) for chunk in chunks)
+        return {
+            'requests': len(chunks),
+            'items': count,
+            'seconds': seconds,
+            'items_per_second': count / seconds if seconds else 0.0,
+        }
@@ -0,0 +1,193 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+
+from api.benchmarks import change, read_results, summarize, write_results
+from api.serializers import UserTokenObtainPairSerializer
+from reviews.models import Categories, Comment, Genre, Review, Title, User
+
+BENCH_ADMIN = 'bench_admin'
+
+
+class Command(BaseCommand):
+    help = ('Замер задержки, количества запросов к БД и пика памяти '
+            'на читающих эндпоинтах API на текущих данных '
+            '(см. generate_dataset)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=200,
+            help='Количество замеряемых запросов на эндпоинт',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=20,
+            help='Количество запросов для прогрева перед замером',
+        )
+        parser.add_argument(
+            '--case', action='append', dest='cases', metavar='NAME',
+            help='Замерить только указанные эндпоинты',
+        )
+        parser.add_argument(
+            '--response-cache', action='store_true',
+            help='Не отключать кэш ответов API',
+        )
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON',
+        )
+        parser.add_argument(
+            '--compare', metavar='BASELINE',
+            help='Сравнить с результатами из файла',
+        )
+
+    def handle(self, *args, **options):
+        cases = self.get_cases()
+        if options['cases']:
+            unknown = set(options['cases']) - set(cases)
+            if unknown:
+                raise CommandError(
+                    f'Нет эндпоинтов: {", ".join(sorted(unknown))}')
+            cases = {name: cases[name] for name in options['cases']}
+        overrides = {'ALLOWED_HOSTS': ['testserver']}
+        if not options['response_cache']:
+            overrides['API_RESPONSE_CACHE'] = {'ENABLED': False, 'TIMEOUT': 0}
+        admin, created = User.objects.get_or_create(
+            username=BENCH_ADMIN,
+            defaults={'email': f'{BENCH_ADMIN}@example.com',
+                      'role': User.ADMIN, 'password': '!'},
+        )
+        results = {}
+        try:
+            client = Client(
+                HTTP_AUTHORIZATION=f'Bearer {self.get_token(admin)}')
+            with override_settings(**overrides):
+                for name, path in cases.items():
+                    results[name] = self.measure(
+                        client, path, options['warmup'],
+                        options['iterations'])
+                    self.stdout.write(
+                        f'{name}: p50 {results[name]["p50_ms"]:.2f} мс, '
+                        f'p99 {results[name]["p99_ms"]:.2f} мс, '
+                        f'запросов к БД {results[name]["queries"]}, '
+                        f'пик памяти {results[name]["peak_kb"]:.0f} КБ'
+                    )
+        finally:
+            # Администратор для замера не остается в базе.
+            if created:
+                admin.delete()
+        if options['output']:
+            write_results(
+                options['output'], 'endpoints', results,
+                dataset=self.get_dataset(),
+                response_cache=options['response_cache'],
+            )
+        if options['compare']:
+            self.compare(read_results(options['compare']), results)
+
+    def get_cases(self):
+        """Читающие эндпоинты api/urls.py с самыми нагруженными объектами"""
+        title = Title.objects.order_by('-reviews_count', 'id').first()
+        review = Review.objects.annotate(
+            comments_count=Count('comments')
+        ).order_by('-comments_count', 'id').first()
+        comment = Comment.objects.order_by('id').first()
+        genre = Genre.objects.order_by('id').first()
+        category = Categories.objects.order_by('id').first()
+        if None in (title, review, comment, genre, category):
+            raise CommandError(
+                'Нет данных для замера, выполните generate_dataset')
+        word = title.name.split()[0]
+        return {
+            'titles_list': '/api/v1/titles/',
+            'titles_filter': (
+                f'/api/v1/titles/?genre={genre.slug}'
+                f'&category={category.slug}&year_min=1950'
+            ),
+            'titles_search': f'/api/v1/titles/?search={word}',
+            'title_detail': f'/api/v1/titles/{title.id}/',
+            'genres_list': '/api/v1/genres/',
+            'categories_list': '/api/v1/categories/',
+            'reviews_list': f'/api/v1/titles/{title.id}/reviews/',
+            'reviews_cursor': (
+                f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'),
+            'review_detail': (
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'),
+            'comments_list': (
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+                '/comments/'
+            ),
+            'comment_detail': (
+                f'/api/v1/titles/{comment.review.title_id}/reviews/'
+                f'{comment.review_id}/comments/{comment.id}/'
+            ),
+            'users_list': '/api/v1/users/',
+            'users_me': '/api/v1/users/me/',
+        }
+
+    def get_token(self, user):
+        """Токен администратора, чтобы замерять и закрытые эндпоинты"""
+        return UserTokenObtainPairSerializer.get_token(user)['token']
+
+    def get_dataset(self):
+        return {
+            model._meta.model_name: model.objects.count()
+            for model in (User, Categories, Genre, Title, Review, Comment)
+        }
+
+    def measure(self, client, path, warmup, iterations):
+        for _ in range(warmup):
+            self.request(client, path)
+        latencies = []
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            for _ in range(iterations):
+                started = time.perf_counter()
+                self.request(client, path)
+                latencies.append(time.perf_counter() - started)
+        # Отдельный запрос под tracemalloc: трассировка замедляет код
+        # и исказила бы задержки.
+        tracemalloc.start()
+        try:
+            self.request(client, path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        stats = summarize(latencies)
+        stats.update({
+            'path': path,
+            'queries': len(queries) / max(iterations, 1),
+            'peak_kb': peak / 1024,
+        })
+        return stats
+
+    def request(self, client, path):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f'{path}: ответ {response.status_code}')
+
+    def compare(self, baseline, results):
+        self.stdout.write(
+            f'Сравнение с {baseline.get("commit") or "базовыми результатами"}'
+        )
+        for name, stats in results.items():
+            before = baseline['results'].get(name)
+            if before is None:
+                self.stdout.write(f'{name}: нет в базовых результатах')
+                continue
+            self.stdout.write(
+                f'{name}: '
+                f'p50 {change(before["p50_ms"], stats["p50_ms"]):+.1f}%, '
+                f'p99 {change(before["p99_ms"], stats["p99_ms"]):+.1f}%, '
+                f'запросов к БД {before["queries"]:g} -> '
+                f'{stats["queries"]:g}, '
+                f'пик памяти '
+                f'{change(before["peak_kb"], stats["peak_kb"]):+.1f}%'
+            )
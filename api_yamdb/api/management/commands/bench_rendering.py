@@ -0,0 +1,95 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api import middleware, readers, renderers
+from api.benchmarks import write_results
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = ('Рендеринг и сжатие больших страниц произведений и отзывов '
+            'на текущих данных (см. generate_dataset)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, action='append', dest='page_sizes',
+            help='Размер страницы, можно указать несколько раз',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество прогонов, берется лучший',
+        )
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON',
+        )
+
+    def handle(self, *args, **options):
+        page_sizes = options['page_sizes'] or [100, 1000]
+        compression = middleware.CompressionMiddleware(lambda request: None)
+        if renderers.orjson is None:
+            self.stdout.write('orjson не установлен, FastJSONRenderer '
+                              'использует стандартный json')
+        results = {}
+        for name, reader, queryset in (
+            ('titles', readers.TitleReader(), Title.objects.order_by('id')),
+            ('reviews', readers.ReviewReader(), Review.objects.all()),
+        ):
+            for page_size in page_sizes:
+                data = reader.to_representation(
+                    list(reader.values(queryset)[:page_size]))
+                if not data:
+                    raise CommandError(
+                        'Нет данных для замера, выполните generate_dataset')
+                key = f'{name}_{len(data)}'
+                results[key] = self.measure_page(
+                    data, compression, options['repeat'])
+                self.report(key, results[key])
+        if options['output']:
+            write_results(options['output'], 'rendering', results,
+                          compression=settings.COMPRESSION)
+
+    def measure_page(self, data, compression, repeat):
+        content = JSONRenderer().render(data)
+        stats = {
+            'bytes': len(content),
+            'render_ms': {
+                'json': self.measure(repeat, JSONRenderer().render, data),
+                'fast': self.measure(
+                    repeat, renderers.FastJSONRenderer().render, data),
+            },
+            'compression': {},
+        }
+        for encoding in compression.encodings:
+            compressed = compression.compress(encoding, content)
+            stats['compression'][encoding] = {
+                'bytes': len(compressed),
+                'ratio': len(content) / len(compressed),
+                'ms': self.measure(
+                    repeat, compression.compress, encoding, content),
+            }
+        return stats
+
+    def measure(self, repeat, function, *args):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function(*args)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000
+
+    def report(self, key, stats):
+        render = stats['render_ms']
+        line = (
+            f'{key}: {stats["bytes"] / 1024:.0f} КБ, '
+            f'json {render["json"]:.2f} мс, fast {render["fast"]:.2f} мс'
+        )
+        for encoding, compressed in stats['compression'].items():
+            line += (
+                f', {encoding} {compressed["ms"]:.2f} мс '
+                f'x{compressed["ratio"]:.1f}'
+            )
+        self.stdout.write(line)
@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Prefetch
+
+from api import readers, serializers
+from api.benchmarks import write_results
+from reviews.models import Comment, Genre, Review, Title
+
+
+class Command(BaseCommand):
+    help = ('Объектов в секунду у сериализаторов DRF и у api.readers '
+            'на текущих данных (см. generate_dataset)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=1000,
+            help='Количество объектов в одном прогоне',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Количество прогонов, берется лучший',
+        )
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON',
+        )
+
+    def handle(self, *args, **options):
+        review = Review.objects.annotate(
+            comments_count=Count('comments')
+        ).order_by('-comments_count').first()
+        if review is None:
+            raise CommandError(
+                'Нет данных для замера, выполните generate_dataset')
+        cases = {
+            'titles': (
+                serializers.TitlesSerializer, readers.TitleReader,
+                Title.objects.select_related('category').prefetch_related(
+                    Prefetch('genre', queryset=Genre.objects.order_by('id'))
+                ).order_by('id'),
+            ),
+            'reviews': (
+                serializers.ReviewSerializer, readers.ReviewReader,
+                Review.objects.select_related('author'),
+            ),
+            'comments': (
+                serializers.CommentSerializer, readers.CommentReader,
+                Comment.objects.select_related('author'),
+            ),
+        }
+        results = {}
+        for name, (serializer_class, reader_class, queryset) in cases.items():
+            queryset = queryset[:options['limit']]
+            reader = reader_class()
+            results[name] = {
+                'objects': len(queryset),
+                'serializer': self.measure(
+                    options['repeat'],
+                    lambda: serializer_class(
+                        list(queryset.all()), many=True).data,
+                ),
+                'reader': self.measure(
+                    options['repeat'],
+                    lambda: reader.to_representation(
+                        list(reader.values(queryset.all()))),
+                ),
+            }
+            stats = results[name]
+            for path in ('serializer', 'reader'):
+                stats[path] = stats['objects'] / stats[path]
+            stats['speedup'] = stats['reader'] / stats['serializer']
+            self.stdout.write(
+                f'{name}: сериализатор {stats["serializer"]:.0f} объектов/с, '
+                f'readers {stats["reader"]:.0f} объектов/с, '
+                f'ускорение {stats["speedup"]:.1f}x'
+            )
+        if options['output']:
+            write_results(options['output'], 'serializers', results)
+
+    def measure(self, repeat, function):
+        """Лучшее время прогона с запросами к БД и построением ответа"""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,98 @@
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import summarize, write_results
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочное сравнение запущенных серверов, например '
+            'wsgi=http://127.0.0.1:8000/api/v1/titles/ '
+            'asgi=http://127.0.0.1:8001/api/v1/titles/')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='+', metavar='NAME=URL',
+            help='Имя режима и адрес, который нагружать',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help='Количество одновременных клиентов',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Общее количество запросов на каждый адрес',
+        )
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON',
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        for target in options['targets']:
+            name, _, url = target.partition('=')
+            if not url:
+                raise CommandError(f'Ожидается NAME=URL, получено {target}')
+            results[name] = self.run(
+                url, options['concurrency'], options['requests'])
+            stats = results[name]
+            self.stdout.write(
+                f'{name}: {stats["rps"]:.0f} запросов/с, '
+                f'p50 {stats["p50_ms"]:.1f} мс, '
+                f'p99 {stats["p99_ms"]:.1f} мс, '
+                f'ошибок {stats["errors"]}'
+            )
+        if options['output']:
+            write_results(options['output'], 'serving', results)
+
+    def run(self, url, concurrency, total):
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path = f'{path}?{parts.query}'
+        latencies, errors = [], []
+        remaining = [total]
+        lock = threading.Lock()
+
+        def client():
+            connection_class = (
+                http.client.HTTPSConnection if parts.scheme == 'https'
+                else http.client.HTTPConnection
+            )
+            connection = connection_class(parts.netloc, timeout=30)
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path)
+                    response = connection.getresponse()
+                    response.read()
+                    failed = response.status >= 400
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    failed = True
+                elapsed = time.perf_counter() - started
+                with lock:
+                    (errors if failed else latencies).append(elapsed)
+            connection.close()
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+        stats = summarize(latencies)
+        stats.update({
+            'rps': len(latencies) / duration,
+            'errors': len(errors),
+            'concurrency': concurrency,
+        })
+        return stats
@@ -0,0 +1,62 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import CSV, EXPORT_FILES, NDJSON, iter_csv, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = ('Выгрузка данных в .csv файлы в формате install_bd '
+            'или одним потоком NDJSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=(CSV, NDJSON), default=CSV,
+            help='Формат выгрузки',
+        )
+        parser.add_argument(
+            '--data-dir', default='export',
+            help='Каталог для .csv файлов',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для NDJSON, по умолчанию стандартный вывод',
+        )
+        parser.add_argument(
+            '--file', action='append', dest='files',
+            choices=list(EXPORT_FILES),
+            help='Выгружаемый файл, можно указать несколько раз',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.EXPORT['CHUNK_SIZE'],
+            help='Количество строк, читаемых из БД за раз',
+        )
+
+    def handle(self, *args, **options):
+        names = [
+            name for name in EXPORT_FILES
+            if not options['files'] or name in options['files']
+        ]
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше нуля')
+        if options['format'] == CSV:
+            self.export_csv(names, options['data_dir'], options['chunk_size'])
+        else:
+            self.export_ndjson(names, options['output'], options['chunk_size'])
+
+    def export_csv(self, names, data_dir, chunk_size):
+        os.makedirs(data_dir, exist_ok=True)
+        for name in names:
+            path = os.path.join(data_dir, f'{name}.csv')
+            with open(path, 'w', newline='', encoding='utf-8') as file:
+                file.writelines(iter_csv(name, chunk_size))
+            self.stdout.write(f'{name}: {path}')
+
+    def export_ndjson(self, names, output, chunk_size):
+        if output is None:
+            for chunk in iter_ndjson(names, chunk_size):
+                self.stdout.write(chunk, ending='')
+            return
+        with open(output, 'w', encoding='utf-8') as file:
+            file.writelines(iter_ndjson(names, chunk_size))
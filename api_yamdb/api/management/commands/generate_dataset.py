@@ -0,0 +1,160 @@
+import random
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.management.commands.install_bd import batches, preserve_auto_now
+from api.signals import invalidate_all
+from reviews.models import (Categories, Comment, Genre, Review, Title,
+                            TitleRanking, User)
+
+# Размер набора при --scale 1.
+BASE_SIZES = {
+    'users': 1000,
+    'categories': 10,
+    'genres': 30,
+    'titles': 2000,
+}
+
+# Параметры распределения Парето: у немногих популярных произведений
+# и отзывов большая часть оценок и комментариев.
+GENRES_ALPHA = 1.5
+REVIEWS_ALPHA = 1.2
+COMMENTS_ALPHA = 1.5
+
+WORDS = (
+    'время', 'город', 'дорога', 'ночь', 'море', 'песня', 'звезда', 'дом',
+    'история', 'тень', 'свет', 'зима', 'ветер', 'огонь', 'сад', 'река',
+    'night', 'road', 'story', 'light', 'river', 'garden', 'winter', 'star',
+)
+
+# Имена пользователей, созданных generate: только их удаляет --clear.
+GENERATED_USERNAME_RE = r'^gen[0-9a-f]{6}_user[0-9]+$'
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических данных для бенчмарков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Множитель размера набора данных',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора для воспроизводимости',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одной вставке',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить произведения, отзывы и созданных генератором '
+                 'пользователей перед генерацией',
+        )
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0:
+            raise CommandError('--scale должен быть больше нуля')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.sizes = {
+            name: max(int(size * options['scale']), 1)
+            for name, size in BASE_SIZES.items()
+        }
+        with ExitStack() as stack:
+            for model in (Review, Comment):
+                stack.enter_context(preserve_auto_now(model))
+            with transaction.atomic():
+                if options['clear']:
+                    self.clear()
+                self.generate()
+        Title.objects.rebuild_ratings()
+        TitleRanking.objects.rebuild()
+        TitleRanking.objects.rebuild_trending(
+            settings.LEADERBOARDS['TRENDING_DAYS'])
+        invalidate_all()
+
+    def clear(self):
+        for model in (Comment, Review, Title, Genre, Categories):
+            model.objects.all().delete()
+        User.objects.filter(username__regex=GENERATED_USERNAME_RE).delete()
+
+    def generate(self):
+        prefix = f'gen{self.random.randrange(16 ** 6):06x}'
+        users = self.create(User, (
+            User(username=f'{prefix}_user{number}',
+                 email=f'{prefix}_user{number}@example.com',
+                 password='!')
+            for number in range(self.sizes['users'])
+        ))
+        categories = self.create(Categories, (
+            Categories(name=f'Категория {number}',
+                       slug=f'{prefix}-category-{number}')
+            for number in range(self.sizes['categories'])
+        ))
+        genres = self.create(Genre, (
+            Genre(name=f'Жанр {number}', slug=f'{prefix}-genre-{number}')
+            for number in range(self.sizes['genres'])
+        ))
+        titles = self.create(Title, (
+            Title(name=self.text(2, 4).capitalize(),
+                  year=self.random.randint(1900, self.now.year),
+                  description=self.text(10, 40),
+                  category_id=self.random.choice(categories))
+            for _ in range(self.sizes['titles'])
+        ))
+        self.create(Title.genre.through, (
+            Title.genre.through(title_id=title, genre_id=genre)
+            for title in titles
+            for genre in self.random.sample(
+                genres, self.skewed(GENRES_ALPHA, len(genres)))
+        ))
+        reviews = self.create(Review, (
+            Review(title_id=title, author_id=author,
+                   text=self.text(5, 60), score=self.random.randint(1, 10),
+                   **self.dates())
+            for title in titles
+            for author in self.random.sample(
+                users, self.skewed(REVIEWS_ALPHA, len(users)))
+        ))
+        self.create(Comment, (
+            Comment(review_id=review,
+                    author_id=self.random.choice(users),
+                    text=self.text(3, 30), **self.dates())
+            for review in reviews
+            for _ in range(self.skewed(COMMENTS_ALPHA, 200) - 1)
+        ))
+
+    def create(self, model, objects):
+        """Пачечная вставка и id созданных строк (SQLite их не возвращает)"""
+        last = model.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        count = 0
+        for batch in batches(objects, self.batch_size):
+            model.objects.bulk_create(batch)
+            count += len(batch)
+        self.stdout.write(f'{model._meta.model_name}: {count}')
+        return list(
+            model.objects.filter(pk__gt=last).order_by('pk')
+            .values_list('pk', flat=True))
+
+    def skewed(self, alpha, limit):
+        """Случайное число от 1 до limit с тяжелым хвостом"""
+        return min(int(self.random.paretovariate(alpha)), limit)
+
+    def text(self, minimum, maximum):
+        return ' '.join(self.random.choices(
+            WORDS, k=self.random.randint(minimum, maximum)))
+
+    def dates(self):
+        """Дата публикации за последние три года, она же дата изменения"""
+        date = self.now - timedelta(
+            seconds=self.random.randrange(3 * 365 * 24 * 3600))
+        return {'pub_date': date, 'updated_at': date}
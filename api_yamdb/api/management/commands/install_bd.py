@@ -1,53 +1,336 @@
 import csv
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.utils import timezone
 
-from reviews.models import Categories, Comment, Genre, Review, Title, User
+from api.signals import invalidate_all
+from reviews.models import (Categories, Comment, Genre, Review, Title,
+                            TitleRanking, User)
 
+# Файл, модель и внешние ключи: колонка CSV -> модель, на которую ссылается.
 CSV_FILES = {
-    'users': User,
-    'category': Categories,
-    'genre': Genre,
-    'titles': Title,
-    'review': Review,
-    'comments': Comment,
+    'users': (User, {}),
+    'category': (Categories, {}),
+    'genre': (Genre, {}),
+    'titles': (Title, {'category': Categories}),
+    'review': (Review, {'title_id': Title, 'author': User}),
+    'comments': (Comment, {'review_id': Review, 'author': User}),
+    'genre_title': (Title.genre.through,
+                    {'title_id': Title, 'genre_id': Genre}),
 }
 
+# Файлы одного этапа не зависят друг от друга и грузятся параллельно.
+STAGES = (
+    ('users', 'category', 'genre'),
+    ('titles',),
+    ('review', 'genre_title'),
+    ('comments',),
+)
+
+CHECKPOINT_FILE = '.install_bd.checkpoint.json'
+
+NULL = r'\N'
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def round_robin(*iterables):
+    iterators = [iter(iterable) for iterable in iterables]
+    while iterators:
+        for iterator in list(iterators):
+            try:
+                yield next(iterator)
+            except StopIteration:
+                iterators.remove(iterator)
+
+
+@contextmanager
+def preserve_auto_now(model):
+    """Сохранение дат из файла вместо auto_now/auto_now_add"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Checkpoint:
+    """Номера загруженных частей каждого файла.
+
+    Часть отмечается после коммита её транзакции. Если импорт упал между
+    коммитом и записью отметки, часть загрузится повторно, а дубли
+    отбросит вставка с игнорированием конфликтов.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done = {}
+        self.resumed = os.path.exists(path)
+        if self.resumed:
+            with open(path, encoding='utf-8') as file:
+                self.done = {
+                    name: set(chunks)
+                    for name, chunks in json.load(file).items()
+                }
+
+    def is_done(self, name, chunk):
+        return chunk in self.done.get(name, ())
+
+    def mark(self, name, chunk):
+        with self.lock:
+            self.done.setdefault(name, set()).add(chunk)
+            self.save()
+
+    def save(self):
+        """Запись отметок; пустой файл пишется до первой части, чтобы
+        повторный запуск после любого сбоя считался продолжением"""
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(
+                {name: sorted(chunks) for name, chunks in self.done.items()},
+                file,
+            )
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        self.done = {}
+        self.resumed = False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
 
 class Command(BaseCommand):
     help = 'Импорт данных из .csv файла'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir', default='static/data',
+            help='Каталог с .csv файлами',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одной вставке',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help='Количество строк в части, загружаемой одной транзакцией',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Количество параллельно загружаемых частей',
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать заново, не продолжая прерванный импорт',
+        )
+
     def handle(self, *args, **options):
-        for file, model in CSV_FILES.items():
-            with open(
-                f'static/data/{file}.csv',
-                newline='',
-                encoding='utf-8'
-            ) as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    if 'category' in row:
-                        category = Categories.objects.get(pk=row['category'])
-                        row['category'] = category
-                    if 'author' in row:
-                        row['author'] = User.objects.get(pk=row['author'])
-                    if 'review_id' in row:
-                        if file == 'comments':
-                            row['review_id'] = int(row['review_id'])
-                        else:
-                            review = Review.objects.get(pk=row['review_id'])
-                            row['review_id'] = review
-                    model.objects.create(**row)
-        self.add_genres_to_titles()
-
-    def add_genres_to_titles(self):
-        with open(
-            'static/data/genre_title.csv',
-            newline='',
-            encoding='utf-8'
-        ) as genre_title:
-            reader = csv.DictReader(genre_title)
-            for row in reader:
-                title = Title.objects.get(pk=row['title_id'])
-                genre = Genre.objects.get(pk=row['genre_id'])
-                title.genre.add(genre)
+        self.data_dir = options['data_dir']
+        self.batch_size = options['batch_size']
+        self.chunk_size = options['chunk_size']
+        self.workers = options['workers']
+        if connection.vendor == 'sqlite':
+            # SQLite не допускает параллельной записи.
+            self.workers = 1
+        self.use_copy = (
+            connection.vendor == 'postgresql' and not options['no_copy']
+        )
+        self.checkpoint = Checkpoint(
+            os.path.join(self.data_dir, CHECKPOINT_FILE))
+        if options['restart']:
+            self.checkpoint.remove()
+        self.ignore_conflicts = self.checkpoint.resumed
+        if self.checkpoint.resumed:
+            self.stdout.write('Продолжение прерванного импорта')
+        self.checkpoint.save()
+        self.known_ids = {
+            model: set(model.objects.values_list('pk', flat=True))
+            for model in (Categories, Genre, Review, Title, User)
+        }
+        self.progress = {}
+        self.progress_lock = threading.Lock()
+        with ExitStack() as stack:
+            self.auto_now_fields = {
+                model: stack.enter_context(preserve_auto_now(model))
+                for model, _ in CSV_FILES.values()
+            }
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for stage in STAGES:
+                    self.run_stage(executor, stage)
+        self.reset_sequences()
+        Title.objects.rebuild_ratings()
+        TitleRanking.objects.rebuild()
+        TitleRanking.objects.rebuild_trending(
+            settings.LEADERBOARDS['TRENDING_DAYS'])
+        invalidate_all()
+        self.checkpoint.remove()
+
+    def run_stage(self, executor, stage):
+        """Загрузка файлов этапа частями в пуле потоков"""
+        pending = set()
+        for name in stage:
+            self.progress[name] = (0, time.monotonic())
+        chunks = round_robin(*(self.read_chunks(name) for name in stage))
+        for name, number, rows in chunks:
+            if self.checkpoint.is_done(name, number):
+                continue
+            if len(pending) >= self.workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self.collect(done)
+            pending.add(executor.submit(self.load_chunk, name, number, rows))
+        done, _ = wait(pending)
+        self.collect(done)
+
+    def collect(self, futures):
+        for future in futures:
+            future.result()
+
+    def read_chunks(self, name):
+        path = os.path.join(self.data_dir, f'{name}.csv')
+        if not os.path.exists(path):
+            raise CommandError(f'Нет файла {path}')
+        with open(path, newline='', encoding='utf-8') as csvfile:
+            reader = csv.DictReader(csvfile)
+            for number, rows in enumerate(batches(reader, self.chunk_size)):
+                yield name, number, rows
+
+    def load_chunk(self, name, number, rows):
+        """Загрузка части файла в отдельной транзакции рабочего потока"""
+        model, foreign_keys = CSV_FILES[name]
+        references = {
+            model._meta.get_field(column).attname: self.known_ids[target]
+            for column, target in foreign_keys.items()
+        }
+        first_line = number * self.chunk_size + 2
+        objects = [
+            self.build_object(
+                model, row, references, f'{name}.csv:{first_line + index}')
+            for index, row in enumerate(rows)
+        ]
+        try:
+            with transaction.atomic():
+                for batch in batches(objects, self.batch_size):
+                    self.insert(model, batch)
+        finally:
+            connections.close_all()
+        if model in self.known_ids:
+            self.known_ids[model].update(obj.pk for obj in objects)
+        self.checkpoint.mark(name, number)
+        self.report(name, len(objects))
+
+    def report(self, name, count):
+        with self.progress_lock:
+            loaded, started = self.progress[name]
+            loaded += count
+            self.progress[name] = (loaded, started)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{name}: {loaded} строк, {loaded / elapsed:.0f} строк/с')
+
+    def build_object(self, model, row, references, where):
+        values = {}
+        for column, value in row.items():
+            field = model._meta.get_field(column)
+            attname = field.attname
+            if field.primary_key:
+                value = int(value)
+            elif attname in references:
+                value = int(value) if value else None
+                if value is not None and value not in references[attname]:
+                    raise CommandError(
+                        f'{where}: нет объекта с id={value} для {column}')
+            values[attname] = value
+        obj = model(**values)
+        now = timezone.now()
+        for field in self.auto_now_fields[model]:
+            if not getattr(obj, field.attname):
+                setattr(obj, field.attname, now)
+        return obj
+
+    def insert(self, model, objects):
+        if self.use_copy:
+            self.copy(model, objects)
+        else:
+            model.objects.bulk_create(
+                objects, ignore_conflicts=self.ignore_conflicts)
+
+    def copy(self, model, objects):
+        """Вставка пачки через COPY FROM STDIN.
+
+        При продолжении импорта строки идут через временную таблицу,
+        чтобы уже загруженные отбросить ON CONFLICT DO NOTHING.
+        """
+        fields = model._meta.concrete_fields
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            row = []
+            for field in fields:
+                value = field.get_db_prep_save(
+                    getattr(obj, field.attname), connection)
+                row.append(NULL if value is None else value)
+            writer.writerow(row)
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        columns = ', '.join(quote(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            target = table
+            if self.ignore_conflicts:
+                target = quote(f'{model._meta.db_table}_import')
+                cursor.execute(
+                    f'CREATE TEMPORARY TABLE {target} '
+                    f'(LIKE {table} INCLUDING DEFAULTS)'
+                )
+            cursor.copy_expert(
+                f'COPY {target} ({columns}) '
+                f"FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+                buffer,
+            )
+            if self.ignore_conflicts:
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) '
+                    f'SELECT {columns} FROM {target} ON CONFLICT DO NOTHING'
+                )
+                # Часть грузится пачками в одной транзакции: следующей
+                # пачке нужна новая временная таблица.
+                cursor.execute(f'DROP TABLE {target}')
+
+    def reset_sequences(self):
+        """Сдвиг последовательностей id после вставки с явными id"""
+        models = [model for model, _ in CSV_FILES.values()]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
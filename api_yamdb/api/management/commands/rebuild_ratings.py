@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Пересчет рейтинга произведений по всем отзывам'
+
+    def handle(self, *args, **options):
+        updated = Title.objects.rebuild_ratings()
+        self.stdout.write(f'Рейтинг пересчитан для {updated} произведений')
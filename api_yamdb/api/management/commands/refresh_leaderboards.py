@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.models import TitleRanking
+
+
+class Command(BaseCommand):
+    help = ('Пересчет таблиц лидеров: по рейтингу и trending за последние '
+            'LEADERBOARDS_TRENDING_DAYS дней')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trending-only', action='store_true',
+            help='Только сдвинуть окно trending',
+        )
+        parser.add_argument(
+            '--days', type=int, default=settings.LEADERBOARDS['TRENDING_DAYS'],
+            help='Окно trending, дней',
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять пересчет trending каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        if not options['trending_only']:
+            TitleRanking.objects.rebuild()
+            self.stdout.write('Таблицы по рейтингу пересчитаны')
+        while True:
+            TitleRanking.objects.rebuild_trending(options['days'])
+            self.stdout.write(
+                f'trending пересчитан за {options["days"]} дней')
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,129 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди исходящих'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Количество писем, забираемых за раз',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Количество попыток отправки одного письма',
+        )
+        parser.add_argument(
+            '--retry-delay', type=int, default=30,
+            help='Задержка перед первой повторной попыткой, секунд',
+        )
+        parser.add_argument(
+            '--lease', type=int, default=600,
+            help='На сколько секунд пачка закрепляется за процессом',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза при пустой очереди, секунд',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.connection = None
+        try:
+            while True:
+                sent = self.send_batch()
+                if options['once'] and not sent:
+                    return
+                if not sent:
+                    self.close_connection()
+                    time.sleep(options['interval'])
+        finally:
+            self.close_connection()
+
+    def get_connection(self):
+        """Одно SMTP-соединение на все письма, пока очередь не опустеет"""
+        if self.connection is None:
+            self.connection = get_connection(fail_silently=False)
+            self.connection.open()
+        return self.connection
+
+    def close_connection(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            finally:
+                self.connection = None
+
+    def send_batch(self):
+        """Отправка пачки писем, возвращает число обработанных"""
+        emails = self.claim_batch()
+        for email in emails:
+            self.send(email)
+        return len(emails)
+
+    def claim_batch(self):
+        """Пачка писем, закрепленная за процессом короткой транзакцией.
+
+        send_after сдвигается на --lease секунд вперед, а попытка
+        засчитывается сразу: после падения процесса неотправленные письма
+        пачки вернутся в очередь, когда истечет срок, а отправленные уже
+        сохранены по одному.
+        """
+        with transaction.atomic():
+            emails = list(
+                OutgoingEmail.objects
+                .pending(self.options['max_attempts'])
+                .select_for_update(skip_locked=True)
+                [:self.options['batch_size']]
+            )
+            lease_until = timezone.now() + timedelta(
+                seconds=self.options['lease'])
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in emails],
+            ).update(send_after=lease_until, attempts=F('attempts') + 1)
+        for email in emails:
+            email.attempts += 1
+            email.send_after = lease_until
+        return emails
+
+    def send(self, email):
+        message = EmailMessage(
+            email.subject,
+            email.body,
+            email.from_email,
+            email.recipients.split(','),
+        )
+        try:
+            self.get_connection().send_messages([message])
+        except Exception as error:
+            # Соединение после ошибки может быть сломано.
+            self.close_connection()
+            delay = self.options['retry_delay'] * 2 ** (email.attempts - 1)
+            email.send_after = timezone.now() + timedelta(seconds=delay)
+            email.last_error = repr(error)
+            self.stderr.write(f'Письмо {email.pk} не отправлено: {error!r}')
+        else:
+            email.sent_at = timezone.now()
+            email.last_error = ''
+        # Номер попытки - отметка аренды: письмо, забранное заново после
+        # истечения срока, этот процесс уже не перезапишет.
+        OutgoingEmail.objects.filter(
+            pk=email.pk, attempts=email.attempts,
+        ).update(
+            sent_at=email.sent_at,
+            send_after=email.send_after,
+            last_error=email.last_error,
+        )
@@ -0,0 +1,124 @@
+"""
+Метрики Prometheus.
+
+Под gunicorn каждый воркер - отдельный процесс, поэтому при заданной
+переменной окружения PROMETHEUS_MULTIPROC_DIR значения пишутся в
+mmap-файлы общего каталога, а /metrics собирает их по всем воркерам.
+Каталог очищается при старте gunicorn, файлы завершившихся воркеров
+помечаются хуком child_exit (см. gunicorn.conf.py).
+"""
+import os
+import sys
+import threading
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds',
+    'Время обработки запроса',
+    ['route', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0,
+             2.5, 5.0, 10.0),
+)
+REQUEST_ERRORS = Counter(
+    'api_request_errors_total',
+    'Ответы с кодом 4xx и 5xx',
+    ['route', 'method', 'status'],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'api_requests_in_progress',
+    'Запросы в обработке во всех воркерах',
+    multiprocess_mode='livesum',
+)
+DB_QUERIES = Histogram(
+    'api_db_queries_per_request',
+    'Количество запросов к БД на HTTP-запрос',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_DURATION = Counter(
+    'api_db_query_seconds_total',
+    'Суммарное время запросов к БД',
+    ['route'],
+)
+RESPONSE_CACHE = Counter(
+    'api_response_cache_requests_total',
+    'Обращения к кэшу ответов',
+    ['namespace', 'result'],
+)
+DB_POOL = Gauge(
+    'api_db_pool_connections',
+    'Соединения пула api_yamdb.db.postgresql_pool',
+    ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAITS = Counter(
+    'api_db_pool_waits',
+    'Ожидания свободного соединения',
+    ['alias', 'kind'],
+)
+
+# Последние значения накопительных счетчиков пула в этом процессе:
+# в Counter попадает только прирост с прошлого замера.
+_pool_totals = {}
+_pool_totals_lock = threading.Lock()
+
+
+def get_route(request):
+    """Имя маршрута из api/urls.py, а для безымянных - его шаблон"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.view_name if match.url_name else match.route
+
+
+def observe_request(request, response, duration, queries, db_duration):
+    route = get_route(request)
+    REQUEST_LATENCY.labels(route, request.method).observe(duration)
+    if response.status_code >= 400:
+        REQUEST_ERRORS.labels(
+            route, request.method, response.status_code).inc()
+    DB_QUERIES.labels(route).observe(queries)
+    DB_DURATION.labels(route).inc(db_duration)
+
+
+def observe_pools():
+    """Состояние пулов соединений, если используется бэкенд с пулом"""
+    backend = sys.modules.get('api_yamdb.db.postgresql_pool.base')
+    if backend is None:
+        return
+    for alias, stats in backend.get_pool_stats().items():
+        DB_POOL.labels(alias, 'in_use').set(stats['in_use'])
+        DB_POOL.labels(alias, 'idle').set(stats['idle'])
+        for kind in ('waits', 'timeouts'):
+            with _pool_totals_lock:
+                previous = _pool_totals.get((alias, kind), 0)
+                _pool_totals[alias, kind] = stats[kind]
+            # Меньшее значение - пул создан заново и считает с нуля.
+            delta = stats[kind] - previous
+            if delta < 0:
+                delta = stats[kind]
+            if delta:
+                DB_POOL_WAITS.labels(alias, kind).inc(delta)
+
+
+def get_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus"""
+    if not settings.METRICS['ENABLED']:
+        raise Http404
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,198 @@
+import gzip
+import io
+import json
+import logging
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+from api import metrics
+from api.timing import RequestTiming
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('api.timing')
+
+GZIP, BROTLI = 'gzip', 'br'
+
+
+def record_queries(timing):
+    """Учет запросов ко всем БД в timing на время блока with"""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(
+            connections[alias].execute_wrapper(timing.record_query))
+    return stack
+
+
+def get_view_action(request):
+    """Класс представления DRF и действие, которые обработали запрос"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None, None
+    view = getattr(match.func, 'cls', match.func)
+    actions = getattr(match.func, 'actions', None) or {}
+    method = request.method.lower()
+    return getattr(view, '__name__', repr(view)), actions.get(method, method)
+
+
+class ServerTimingMiddleware:
+    """Время запросов к БД, сериализации, рендеринга и всего запроса.
+
+    Для доли запросов ``SERVER_TIMING['SAMPLE_RATE']`` добавляет заголовок
+    Server-Timing и пишет строку JSON в логгер ``api.timing``. Остальные
+    запросы проходят без замеров.
+    """
+
+    def __init__(self, get_response):
+        options = settings.SERVER_TIMING
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = options['SAMPLE_RATE']
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        timing = request.server_timing = RequestTiming()
+        with record_queries(timing):
+            response = self.get_response(request)
+        timing.finish()
+        response['Server-Timing'] = timing.header()
+        view, action = get_view_action(request)
+        logger.info(json.dumps({
+            'view': view,
+            'action': action,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **timing.as_dict(),
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            timing.start_render(response)
+        return response
+
+
+class MetricsMiddleware:
+    """Метрики Prometheus по маршрутам: задержка, ошибки и запросы к БД"""
+
+    def __init__(self, get_response):
+        if not settings.METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        metrics.REQUESTS_IN_PROGRESS.inc()
+        try:
+            with record_queries(timing):
+                response = self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_PROGRESS.dec()
+        timing.finish()
+        metrics.observe_request(
+            request, response, timing.durations['total'], timing.queries,
+            timing.durations['db'])
+        metrics.observe_pools()
+        return response
+
+
+def parse_accept_encoding(header):
+    """Кодировки из заголовка Accept-Encoding и их веса q"""
+    encodings = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+class CompressionMiddleware:
+    """Сжатие ответов brotli или gzip по заголовку Accept-Encoding.
+
+    Ответы короче ``COMPRESSION['MIN_SIZE']`` байт не сжимаются: на них
+    сжатие стоит дороже, чем экономит. brotli доступен, если установлен
+    пакет brotli; потоковые ответы сжимаются только gzip.
+    """
+
+    def __init__(self, get_response):
+        options = settings.COMPRESSION
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.min_size = options['MIN_SIZE']
+        self.gzip_level = options['GZIP_LEVEL']
+        self.brotli_quality = options['BROTLI_QUALITY']
+        # Порядок предпочтения при равных весах.
+        self.encodings = (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+            response.streaming)
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content)
+            del response['Content-Length']
+        else:
+            content = self.compress(encoding, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Сжатое тело побайтно отличается от исходного.
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def choose_encoding(self, header, streaming):
+        accepted = parse_accept_encoding(header)
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            if streaming and encoding != GZIP:
+                continue
+            quality = accepted.get(encoding, accepted.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, encoding, content):
+        if encoding == BROTLI:
+            return brotli.compress(content, quality=self.brotli_quality)
+        buffer = io.BytesIO()
+        with gzip.GzipFile(mode='wb', compresslevel=self.gzip_level,
+                           fileobj=buffer, mtime=0) as file:
+            file.write(content)
+        return buffer.getvalue()
@@ -1,11 +1,251 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .cache import get_generation
+
+EXACT, CACHED, ESTIMATE = 'exact', 'cached', 'estimate'
+
+
+def exact_count(queryset):
+    return queryset.count(), True
+
+
+def cached_count(queryset):
+    """Точный COUNT, закэшированный до изменения модели или TTL"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}{params!r}'.encode()).hexdigest()
+    label = queryset.model._meta.label_lower
+    key = f'api:count:{label}:{get_generation(label)}:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATION_COUNT['CACHE_TIMEOUT'])
+    return count, True
+
+
+def estimated_count(queryset):
+    """Оценка планировщика PostgreSQL для больших выборок"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return exact_count(queryset)
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    if estimate < settings.PAGINATION_COUNT['ESTIMATE_THRESHOLD']:
+        return exact_count(queryset)
+    return estimate, False
+
+
+COUNT_STRATEGIES = {
+    EXACT: exact_count,
+    CACHED: cached_count,
+    ESTIMATE: estimated_count,
+}
 
 
-class ApiPagination(PageNumberPagination):
+class CountingPaginator(Paginator):
+    """Paginator с выбираемой стратегией подсчета записей"""
+
+    def __init__(self, *args, count_strategy=EXACT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_strategy = count_strategy
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        count, self.count_exact = COUNT_STRATEGIES[self.count_strategy](
+            self.object_list)
+        return count
+
+
+class CountedPagination(PageNumberPagination):
+    """Постраничная пагинация с признаком точности count.
+
+    Стратегия берется из атрибута ``count_strategy`` представления,
+    по умолчанию из ``PAGINATION_COUNT['STRATEGY']``.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        strategy = getattr(
+            view, 'count_strategy', settings.PAGINATION_COUNT['STRATEGY'])
+        self.django_paginator_class = partial(
+            CountingPaginator, count_strategy=strategy)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_exact', self.page.paginator.count_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_exact'] = {'type': 'boolean'}
+        return response_schema
+
+
+class ApiPagination(CountedPagination):
     def get_paginated_response(self, data):
         return Response({
             'links': {},
             'count': self.page.paginator.count,
+            'count_exact': self.page.paginator.count_exact,
             'response': data
         })
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по набору полей сортировки.
+
+    Следующая страница выбирается условием по значениям полей последнего
+    объекта, а не OFFSET, поэтому глубокие страницы стоят столько же,
+    сколько первая, а новые записи не сдвигают уже выданные.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position))
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_keyset_filter(self, position):
+        """Лексикографическое условие (a, b) < (a0, b0) с учетом
+        направления сортировки каждого поля"""
+        keyset = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            name = field.lstrip('-')
+            keyset |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return keyset
+
+    def get_position(self, obj):
+        position = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            # Строки values() из api.readers приходят словарями.
+            if isinstance(obj, dict):
+                value = obj[name]
+            else:
+                value = getattr(obj, name)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def encode_cursor(self, position):
+        data = json.dumps(position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, request, model):
+        """Значения полей сортировки из курсора, приведенные к типам полей"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(position, list)
+                or len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.get_position(self.page[-1]))
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class PageOrCursorPagination(CountedPagination):
+    """Постраничная пагинация с курсорным режимом по запросу.
+
+    Курсорный режим включается параметром ``?pagination=cursor``,
+    последующие страницы запрашиваются по ссылке ``next`` с ``cursor``.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    keyset_class = KeysetPagination
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.get_page_size(request)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
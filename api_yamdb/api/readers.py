@@ -0,0 +1,174 @@
+from django.conf import settings
+from rest_framework.relations import RelatedField
+from rest_framework.response import Response
+
+from api import serializers
+from api.sparse import get_requested_fields
+from reviews.models import Title
+
+
+class ValuesReader:
+    """Ответ сериализатора для чтения, собранный из строк values().
+
+    Значения преобразуют to_representation полей одного экземпляра
+    ``serializer_class``, поэтому результат совпадает с
+    ``serializer_class(objects, many=True).data``, но без модели и
+    сериализатора на каждый объект.
+    """
+    serializer_class = None
+    # Поле ответа -> выражение для values(); для связанных полей -
+    # уже готовое значение, например author__username.
+    columns = {}
+    # Поле ответа -> дополнительные колонки для его представления.
+    extra_columns = {}
+    # Колонки, нужные всегда: id и поля курсорной пагинации.
+    required_columns = ('id',)
+
+    def __init__(self):
+        fields = self.serializer_class().fields
+        self.field_names = list(fields)
+        self.converters = {}
+        for name in self.columns:
+            field = fields[name]
+            self.converters[name] = (
+                None if isinstance(field, RelatedField)
+                else field.to_representation
+            )
+
+    def get_field_names(self, fields=None):
+        """Поля ответа в порядке сериализатора, fields - из ?fields="""
+        if fields is None:
+            return self.field_names
+        return [name for name in self.field_names if name in fields]
+
+    def values(self, queryset, fields=None):
+        columns = list(self.required_columns)
+        for name in self.get_field_names(fields):
+            if name in self.columns:
+                columns.append(self.columns[name])
+            columns.extend(self.extra_columns.get(name, ()))
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(columns))
+
+    def to_representation(self, rows, fields=None):
+        names = self.get_field_names(fields)
+        related = self.load_related(rows, names) if rows else None
+        return [
+            self.row_to_representation(row, related, names) for row in rows
+        ]
+
+    def row_to_representation(self, row, related, names):
+        data = {}
+        for name in names:
+            column = self.columns.get(name)
+            if column is None:
+                data[name] = self.related_to_representation(
+                    name, row, related)
+                continue
+            value = row[column]
+            converter = self.converters[name]
+            data[name] = (
+                value if value is None or converter is None
+                else converter(value)
+            )
+        return data
+
+    def load_related(self, rows, names):
+        """Связанные объекты для всех строк страницы одним запросом"""
+
+    def related_to_representation(self, name, row, related):
+        """Вложенный объект из extra_columns: category__slug -> slug.
+
+        Без связанного объекта (все колонки None) - None.
+        """
+        data = {
+            column.rsplit('__', 1)[-1]: row[column]
+            for column in self.extra_columns[name]
+        }
+        if all(value is None for value in data.values()):
+            return None
+        return data
+
+
+class TitleReader(ValuesReader):
+    serializer_class = serializers.TitlesSerializer
+    columns = {
+        'id': 'id',
+        'name': 'name',
+        'year': 'year',
+        'rating': 'rating',
+        'description': 'description',
+    }
+    extra_columns = {'category': ('category__name', 'category__slug')}
+
+    def load_related(self, rows, names):
+        if 'genre' not in names:
+            return None
+        genres = {}
+        through = Title.genre.through.objects.filter(
+            title_id__in=[row['id'] for row in rows]
+        ).order_by('genre_id').values_list(
+            'title_id', 'genre__name', 'genre__slug')
+        for title_id, name, slug in through:
+            genres.setdefault(title_id, []).append(
+                {'name': name, 'slug': slug})
+        return genres
+
+    def related_to_representation(self, name, row, related):
+        if name == 'genre':
+            return related.get(row['id'], [])
+        return super().related_to_representation(name, row, related)
+
+
+class ReviewReader(ValuesReader):
+    serializer_class = serializers.ReviewSerializer
+    columns = {
+        'id': 'id',
+        'text': 'text',
+        'author': 'author__username',
+        'score': 'score',
+        'pub_date': 'pub_date',
+    }
+    required_columns = ('id', 'pub_date')
+
+
+class CommentReader(ValuesReader):
+    serializer_class = serializers.CommentSerializer
+    columns = {
+        'id': 'id',
+        'text': 'text',
+        'author': 'author__username',
+        'pub_date': 'pub_date',
+    }
+    required_columns = ('id', 'pub_date')
+
+
+class FastReadMixin:
+    """Список через ``reader_class`` вместо сериализатора на каждый объект.
+
+    Отключается настройкой API_FAST_READ, тогда список строит
+    ``serializer_class``.
+    """
+    reader_class = None
+    _readers = {}
+
+    def get_reader(self):
+        if self.reader_class not in self._readers:
+            self._readers[self.reader_class] = self.reader_class()
+        return self._readers[self.reader_class]
+
+    def list(self, request, *args, **kwargs):
+        if self.reader_class is None or not settings.API_FAST_READ:
+            return super().list(request, *args, **kwargs)
+        reader = self.get_reader()
+        fields = get_requested_fields(request, reader.field_names)
+        represent = reader.to_representation
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            represent = timing.timed('serialize', represent)
+        queryset = reader.values(
+            self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(represent(page, fields))
+        return Response(represent(list(queryset), fields))
@@ -0,0 +1,152 @@
+import time
+
+from django.conf import settings
+from django.db.models.signals import m2m_changed
+from django.utils.encoding import smart_str
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+from reviews.models import Genre, Title
+
+from .cache import get_generation
+from .conditional import get_modified_label
+
+# Модель -> (поколение, срок годности, {слаг: id}) в памяти процесса.
+_slug_ids = {}
+
+
+def resolve_slugs(model, slugs):
+    """id объектов по слагам: из кэша процесса, недостающие одним IN.
+
+    Кэш сбрасывается, когда api.signals сдвигает поколение изменений
+    модели, и по истечении SLUG_CACHE['TIMEOUT'] секунд. Без общего кэша
+    он живет один запрос (см. forget_slugs).
+    """
+    generation = get_generation(get_modified_label(model))
+    now = time.monotonic()
+    cached_generation, expires, ids = _slug_ids.get(model, (None, 0, None))
+    if cached_generation != generation or expires < now:
+        ids = {}
+        _slug_ids[model] = (
+            generation, now + settings.SLUG_CACHE['TIMEOUT'], ids)
+    missing = {slug for slug in slugs if slug not in ids}
+    if missing:
+        ids.update(model.objects.filter(
+            slug__in=missing).values_list('slug', 'id'))
+    return {slug: ids[slug] for slug in slugs if slug in ids}
+
+
+def forget_slugs(**kwargs):
+    """Сброс кэша слагов в начале запроса, если поколения не общие.
+
+    С кэшем процесса поколение сдвигается только в воркере, записавшем
+    изменение: жанр, удаленный в другом воркере, остался бы в кэше, и
+    запись произведения упала бы на внешнем ключе вместо ответа 400.
+    """
+    if not settings.SHARED_CACHE:
+        _slug_ids.clear()
+
+
+def resolve_batch_slugs(serializer, items):
+    """Слаги связей всех элементов пачки - один запрос на модель.
+
+    Дальше поля сериализаторов элементов находят их в кэше процесса.
+    """
+    slugs = {}
+    for name, field in serializer.fields.items():
+        if isinstance(field, CachedManySlugRelatedField):
+            field, many = field.child_relation, True
+        elif isinstance(field, CachedSlugRelatedField):
+            many = False
+        else:
+            continue
+        values = slugs.setdefault(field.get_queryset().model, set())
+        for item in items:
+            if not isinstance(item, dict) or name not in item:
+                continue
+            value = item[name]
+            if not many:
+                value = [value]
+            if isinstance(value, list):
+                values.update(
+                    slug for slug in value if isinstance(slug, str))
+    for model, values in slugs.items():
+        if values:
+            resolve_slugs(model, values)
+
+
+def set_genres(title, genres, created=False):
+    """Замена жанров произведения только добавленными и удаленными строками.
+
+    m2m_changed отправляется как при Title.genre.set: от него зависят
+    кэши и дата изменения произведения.
+    """
+    through = Title.genre.through
+    current = set() if created else set(
+        through.objects.filter(title_id=title.pk)
+        .values_list('genre_id', flat=True))
+    new = {genre.pk for genre in genres}
+    removed, added = current - new, new - current
+    if removed:
+        send_genre_change(title, 'pre_remove', removed)
+        through.objects.filter(
+            title_id=title.pk, genre_id__in=removed).delete()
+        send_genre_change(title, 'post_remove', removed)
+    if added:
+        send_genre_change(title, 'pre_add', added)
+        through.objects.bulk_create(
+            through(title_id=title.pk, genre_id=genre_id)
+            for genre_id in sorted(added))
+        send_genre_change(title, 'post_add', added)
+
+
+def send_genre_change(title, action, pk_set):
+    m2m_changed.send(
+        sender=Title.genre.through, instance=title, action=action,
+        reverse=False, model=Genre, pk_set=pk_set, using=title._state.db,
+    )
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField без запроса на каждый слаг.
+
+    Возвращает неполный объект модели с id и слагом: его хватает для
+    записи внешнего ключа и для ответа.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CachedManySlugRelatedField(**list_kwargs)
+
+    def to_internal_value(self, data):
+        return self.to_objects([data])[0]
+
+    def to_objects(self, values):
+        if not all(isinstance(value, str) for value in values):
+            self.fail('invalid')
+        values = list(dict.fromkeys(values))
+        model = self.get_queryset().model
+        ids = resolve_slugs(model, values)
+        for value in values:
+            if value not in ids:
+                self.fail('does_not_exist', slug_name=self.slug_field,
+                          value=smart_str(value))
+        return [
+            model(**{'pk': ids[value], self.slug_field: value})
+            for value in values
+        ]
+
+
+class CachedManySlugRelatedField(ManyRelatedField):
+    """Все слаги списка разрешаются одним вызовом resolve_slugs"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.to_objects(list(data))
@@ -0,0 +1,92 @@
+import re
+
+from django.db import connections, models
+from django.db.models import Case, Value, When
+from django.db.models.expressions import RawSQL
+
+# Конфигурация разбора текста: названия бывают и на русском, и на
+# английском, поэтому без стемминга. Должна совпадать с миграцией.
+SEARCH_CONFIG = 'simple'
+
+WORD = re.compile(r'\w+')
+
+
+def get_terms(query):
+    """Слова запроса без операторов tsquery"""
+    return WORD.findall(query.lower())
+
+
+def to_prefix_tsquery(terms):
+    """Все слова обязательны, последнее может быть недописанным"""
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def search_titles(queryset, query):
+    """Поиск произведений с сортировкой по релевантности"""
+    terms = get_terms(query)
+    if not terms:
+        return queryset
+    if connections[queryset.db].vendor == 'postgresql':
+        return _postgresql_search(queryset, query, terms)
+    return _fallback_search(queryset, query, terms)
+
+
+def _postgresql_search(queryset, query, terms):
+    """Полнотекстовый поиск по search_vector (GIN) и поиск подстроки в
+    названии через триграммный индекс на UPPER(name)"""
+    table = queryset.model._meta.db_table
+    tsquery = to_prefix_tsquery(terms)
+    return queryset.annotate(
+        search_rank=RawSQL(
+            f'ts_rank("{table}"."search_vector", '
+            f'to_tsquery(%s, %s)) + similarity("{table}"."name", %s)',
+            (SEARCH_CONFIG, tsquery, query),
+            output_field=models.FloatField(),
+        ),
+    ).extra(
+        where=[
+            f'("{table}"."search_vector" @@ to_tsquery(%s, %s) '
+            f'OR UPPER("{table}"."name"::text) LIKE UPPER(%s))'
+        ],
+        params=[SEARCH_CONFIG, tsquery, f'%{_escape_like(query)}%'],
+    ).order_by('-search_rank', 'id')
+
+
+def _fallback_search(queryset, query, terms):
+    """Поиск в процессе для остальных СУБД (LIKE в SQLite не различает
+    регистр только у латиницы): каждое слово в названии или описании,
+    выше точное совпадение и совпадение с началом названия"""
+    needle = query.strip().casefold()
+    terms = [term.casefold() for term in terms]
+    ranked = {}
+    rows = queryset.order_by().values_list('pk', 'name', 'description')
+    for pk, name, description in rows.iterator():
+        name = name.casefold()
+        text = f'{name} {description.casefold()}'
+        if not all(term in text for term in terms):
+            continue
+        if name == needle:
+            rank = 3.0
+        elif name.startswith(needle):
+            rank = 2.0
+        elif needle in name:
+            rank = 1.0
+        else:
+            rank = 0.0
+        ranked.setdefault(rank, []).append(pk)
+    return queryset.filter(
+        pk__in=[pk for pks in ranked.values() for pk in pks],
+    ).annotate(
+        search_rank=Case(
+            *(When(pk__in=pks, then=Value(rank))
+              for rank, pks in ranked.items()),
+            default=Value(0.0),
+            output_field=models.FloatField(),
+        ),
+    ).order_by('-search_rank', 'id')
+
+
+def _escape_like(value):
+    return (
+        value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    )
@@ -1,17 +1,21 @@
 import datetime as dt
 
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.relations import CachedSlugRelatedField, set_genres
+from api.sparse import SparseFieldsetMixin
 from api_yamdb.settings import MAIL
-from reviews.models import Categories, Genre, Title, User, Comment, Review
+from reviews.models import (Categories, Comment, Genre, OutgoingEmail,
+                            Review, Title, TitleRanking, User)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True)
 
@@ -19,21 +23,28 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         model = Review
 
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-        user = self.context['request'].user
-        title_id = (
-            self.context['request'].parser_context['kwargs']['title_id']
-        )
-        if Review.objects.filter(author=user, title__id=title_id).exists():
-            raise serializers.ValidationError(
-                'Вы уже оставили отзыв на данное произведение'
-            )
-        return data
-
-
-class CommentSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        """Повторный отзыв отсекает ограничение unique_author_title"""
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author=validated_data['author'],
+                title=validated_data['title'],
+            ).exists():
+                raise
+        raise serializers.ValidationError({
+            api_settings.NON_FIELD_ERRORS_KEY: [
+                'Вы уже оставили отзыв на данное произведение'],
+        })
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        return super().update(instance, validated_data)
+
+
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
@@ -54,6 +65,9 @@ class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = RefreshToken.for_user(user)
         token['username'] = user.username
+        token['role'] = user.role
+        token['is_superuser'] = user.is_superuser
+        token['ver'] = user.token_version
         token['confirmation_code'] = user.confirmation_code
         return {'token': str(token.access_token)}
 
@@ -89,18 +103,18 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         read_only_fields = ('role', 'bio')
 
+    @transaction.atomic
     def create(self, validated_data):
+        """Письмо с кодом ставится в очередь, отправляет его send_emails"""
         user = User.objects.create(
             username=validated_data['username'],
             email=validated_data['email'],
         )
-        user.save()
-        send_mail(
-            'Confirmation code',
-            f'{user.confirmation_code}',
-            MAIL,
-            [validated_data['email']],
-            fail_silently=False,
+        OutgoingEmail.objects.create(
+            subject='Confirmation code',
+            body=f'{user.confirmation_code}',
+            from_email=MAIL,
+            recipients=validated_data['email'],
         )
         return user
 
@@ -118,7 +132,21 @@ class UsersSerializer(serializers.ModelSerializer):
         model = User
 
 
-class GenreSerializer(serializers.ModelSerializer):
+# Слаги, занятые адресами api/urls.py вроде genres/batch/.
+RESERVED_SLUGS = ('batch',)
+
+
+class ReservedSlugMixin:
+    """Запрет слагов, совпадающих с адресами рядом с адресом по слагу"""
+
+    def validate_slug(self, value):
+        if value in RESERVED_SLUGS:
+            raise serializers.ValidationError(
+                f'Слаг {value} зарезервирован')
+        return value
+
+
+class GenreSerializer(ReservedSlugMixin, serializers.ModelSerializer):
     """Показ жанра"""
     name = serializers.CharField(required=False)
 
@@ -127,7 +155,7 @@ class GenreSerializer(serializers.ModelSerializer):
         model = Genre
 
 
-class CategorieSerializer(serializers.ModelSerializer):
+class CategorieSerializer(ReservedSlugMixin, serializers.ModelSerializer):
     """Показ категорий"""
     class Meta:
         fields = ('name', 'slug')
@@ -136,13 +164,13 @@ class CategorieSerializer(serializers.ModelSerializer):
 
 class PostTitlesSerializer(serializers.ModelSerializer):
     """Добавление публикаций"""
-    genre = serializers.SlugRelatedField(slug_field='slug',
-                                         queryset=Genre.objects.all(),
-                                         many=True,
-                                         required=True)
-    category = serializers.SlugRelatedField(slug_field='slug',
-                                            queryset=Categories.objects.all(),
-                                            required=True)
+    genre = CachedSlugRelatedField(slug_field='slug',
+                                   queryset=Genre.objects.all(),
+                                   many=True,
+                                   required=True)
+    category = CachedSlugRelatedField(slug_field='slug',
+                                      queryset=Categories.objects.all(),
+                                      required=True)
     description = serializers.CharField(required=False)
 
     class Meta:
@@ -151,6 +179,22 @@ class PostTitlesSerializer(serializers.ModelSerializer):
         model = Title
         read_only_fields = ('rating',)
 
+    @transaction.atomic
+    def create(self, validated_data):
+        genres = validated_data.pop('genre')
+        title = super().create(validated_data)
+        set_genres(title, genres, created=True)
+        return title
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """Жанры меняются только добавленными и удаленными строками"""
+        genres = validated_data.pop('genre', None)
+        title = super().update(instance, validated_data)
+        if genres is not None:
+            set_genres(title, genres)
+        return title
+
     def validate_year(self, value):
         """Проверка года"""
         year = dt.date.today().year
@@ -160,11 +204,10 @@ class PostTitlesSerializer(serializers.ModelSerializer):
         return value
 
 
-class TitlesSerializer(serializers.ModelSerializer):
+class TitlesSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Чтение публикаций"""
     genre = GenreSerializer(required=True, many=True)
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True)
+    rating = serializers.IntegerField(read_only=True)
     category = CategorieSerializer(required=True)
     description = serializers.CharField(required=False)
 
@@ -173,3 +216,19 @@ class TitlesSerializer(serializers.ModelSerializer):
                   'description', 'genre', 'category')
         model = Title
         read_only_fields = ('rating',)
+
+
+class LeaderboardTitleSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ('id', 'name', 'year', 'rating')
+        model = Title
+
+
+class LeaderboardSerializer(serializers.ModelSerializer):
+    """Место в таблице лидеров"""
+    title = LeaderboardTitleSerializer(read_only=True)
+
+    class Meta:
+        fields = ('score', 'reviews_count', 'title')
+        model = TitleRanking
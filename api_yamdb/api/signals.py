@@ -0,0 +1,153 @@
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from reviews.models import Categories, Comment, Genre, Review, Title, User
+
+from .authentication import forget_user
+from .cache import bump_generation
+from .conditional import get_modified_label
+from .relations import forget_slugs
+
+# Создание и удаление модели-ключа меняет число записей в выборках
+# перечисленных моделей: списки произведений фильтруются по жанрам
+# и категориям.
+COUNT_DEPENDENCIES = {
+    Title: (Title,),
+    Genre: (Genre, Title),
+    Categories: (Categories, Title),
+    Review: (Review,),
+    Comment: (Comment,),
+}
+
+# Изменение модели-ключа меняет ответы перечисленных моделей: отзыв
+# пересчитывает рейтинг произведения, имя пользователя вложено в его
+# отзывы и комментарии.
+MODIFIED_DEPENDENCIES = {
+    Title: (Title,),
+    Genre: (Genre,),
+    Categories: (Categories,),
+    Review: (Review, Title),
+    Comment: (Comment,),
+    User: (Review, Comment),
+}
+
+RESPONSE_NAMESPACES = {
+    Title: 'titles',
+    Genre: 'genres',
+    Categories: 'categories',
+}
+
+
+def get_response_namespaces(sender, instance):
+    """Пространства имен кэша ответов, которые устаревают при изменении"""
+    if sender is Review:
+        return ['titles', f'titles:{instance.title_id}']
+    namespace = RESPONSE_NAMESPACES[sender]
+    namespaces = [namespace, f'{namespace}:{instance.pk}']
+    if sender is not Title:
+        # Жанры и категории вложены в каждое произведение.
+        namespaces += ['titles', 'titles:all']
+    return namespaces
+
+
+def bump_on_commit(*labels):
+    # После коммита, иначе параллельный запрос успеет закэшировать
+    # старые данные под новым поколением.
+    transaction.on_commit(lambda: bump_generation(*labels))
+
+
+def invalidate_counts(sender):
+    bump_on_commit(*(
+        model._meta.label_lower for model in COUNT_DEPENDENCIES[sender]
+    ))
+
+
+def invalidate_validators(sender):
+    bump_on_commit(*(
+        get_modified_label(model) for model in MODIFIED_DEPENDENCIES[sender]
+    ))
+
+
+def invalidate_responses(sender, instance):
+    if sender in RESPONSE_NAMESPACES or sender is Review:
+        bump_on_commit(*get_response_namespaces(sender, instance))
+
+
+def invalidate_model(sender):
+    """Сброс кэшей модели после пачечной записи в обход сигналов"""
+    invalidate_counts(sender)
+    invalidate_validators(sender)
+    namespace = RESPONSE_NAMESPACES[sender]
+    namespaces = [namespace, f'{namespace}:all']
+    if sender is not Title:
+        namespaces += ['titles', 'titles:all']
+    bump_on_commit(*namespaces)
+
+
+def invalidate_all():
+    """Сброс всех кэшей после массовых операций в обход сигналов"""
+    namespaces = []
+    for namespace in RESPONSE_NAMESPACES.values():
+        namespaces += [namespace, f'{namespace}:all']
+    bump_on_commit(*namespaces, *(
+        model._meta.label_lower for model in COUNT_DEPENDENCIES
+    ), *(
+        get_modified_label(model) for model in MODIFIED_DEPENDENCIES
+    ))
+
+
+def on_save(sender, instance, created, **kwargs):
+    if created:
+        invalidate_counts(sender)
+    invalidate_validators(sender)
+    invalidate_responses(sender, instance)
+
+
+def on_delete(sender, instance, **kwargs):
+    invalidate_counts(sender)
+    invalidate_validators(sender)
+    invalidate_responses(sender, instance)
+
+
+def on_genre_change(sender, instance, action, reverse, model, pk_set,
+                    **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    invalidate_counts(Title)
+    invalidate_validators(Title)
+    if reverse:
+        titles = pk_set if pk_set is not None else ['all']
+        bump_on_commit('titles', *(f'titles:{pk}' for pk in titles))
+    else:
+        invalidate_responses(Title, instance)
+
+
+def on_user_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda: forget_user(instance.pk))
+
+
+def on_user_save(sender, instance, **kwargs):
+    on_user_change(sender, instance)
+    # До конца User.save в _loaded_claims - значения из БД.
+    loaded = getattr(instance, '_loaded_claims', None)
+    index = User.TOKEN_CLAIM_FIELDS.index('username')
+    if loaded is None or loaded[index] != instance.username:
+        invalidate_validators(User)
+
+
+def connect():
+    for model in COUNT_DEPENDENCIES:
+        label = model._meta.label_lower
+        post_save.connect(
+            on_save, sender=model, dispatch_uid=f'cache_save_{label}')
+        post_delete.connect(
+            on_delete, sender=model, dispatch_uid=f'cache_delete_{label}')
+    post_save.connect(
+        on_user_save, sender=User, dispatch_uid='auth_user_save')
+    post_delete.connect(
+        on_user_change, sender=User, dispatch_uid='auth_user_delete')
+    m2m_changed.connect(
+        on_genre_change, sender=Title.genre.through,
+        dispatch_uid='cache_title_genre')
+    request_started.connect(forget_slugs, dispatch_uid='api_forget_slugs')
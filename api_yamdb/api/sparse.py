@@ -0,0 +1,72 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from api.filter import split_csv
+
+FIELDS_PARAM = 'fields'
+
+
+def get_requested_fields(request, available):
+    """Поля ответа из ?fields=name,year; None - все поля.
+
+    Учитывается только в запросах на чтение.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get(FIELDS_PARAM)
+    if not value:
+        return None
+    fields = split_csv(value)
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ValidationError(
+            {FIELDS_PARAM: [f'Нет полей: {", ".join(unknown)}']})
+    return fields
+
+
+class SparseFieldsetMixin:
+    """Сериализатор только с полями из ?fields="""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = get_requested_fields(
+            self.context.get('request'), self.Meta.fields)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseQuerysetMixin:
+    """Из БД читаются только поля из ?fields= и нужные им связи.
+
+    ``sparse_select`` и ``sparse_prefetch`` - связи полей ответа для
+    select_related и prefetch_related, ``sparse_required`` - колонки,
+    нужные всегда, например для курсорной пагинации.
+    """
+    sparse_select = {}
+    sparse_prefetch = {}
+    sparse_required = ('id',)
+
+    def get_requested_fields(self):
+        return get_requested_fields(
+            self.request, self.get_serializer_class().Meta.fields)
+
+    def load_fields(self, queryset):
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset.select_related(
+                *self.sparse_select.values()
+            ).prefetch_related(*self.sparse_prefetch.values())
+        concrete = {
+            field.name for field in queryset.model._meta.concrete_fields
+        }
+        return queryset.select_related(*(
+            relation for name, relation in self.sparse_select.items()
+            if name in fields
+        )).prefetch_related(*(
+            relation for name, relation in self.sparse_prefetch.items()
+            if name in fields
+        )).only(*(
+            name for name in dict.fromkeys((*self.sparse_required, *fields))
+            if name in concrete
+        ))
@@ -0,0 +1,44 @@
+import asyncio
+
+from rest_framework.test import APITransactionTestCase
+
+from api_yamdb.asgi import application
+from reviews.models import Genre
+
+
+class AsgiApplicationTest(APITransactionTestCase):
+    """ASGI-обертка отдает ответы Django из пула потоков"""
+
+    def request(self, path):
+        self.sent = []
+        incoming = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            self.sent.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': b'', 'http_version': '1.1',
+            'headers': [(b'host', b'testserver')],
+        }
+        asyncio.run(application(scope, receive, send))
+        return self.sent
+
+    def test_get_genres(self):
+        Genre.objects.create(name='Рок', slug='rock')
+        start, body = self.request('/api/v1/genres/')
+        self.assertEqual(start['status'], 200)
+        self.assertIn('rock'.encode(), body['body'])
+
+    def test_large_response_is_streamed(self):
+        application.buffer_size, buffer_size = 10, application.buffer_size
+        try:
+            messages = self.request('/api/v1/genres/')
+        finally:
+            application.buffer_size = buffer_size
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertTrue(messages[1]['more_body'])
+        self.assertFalse(messages[-1].get('more_body', False))
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITransactionTestCase
+
+from api.serializers import UserTokenObtainPairSerializer
+from reviews.models import Review, Title, User
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0})
+class StatelessJWTTest(APITransactionTestCase):
+    """Аутентификация по claims токена без чтения пользователя"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            username='moderator', email='m@ya.ru', role=User.MODERATOR)
+        self.author = User.objects.create(username='author', email='a@ya.ru')
+        self.title = Title.objects.create(
+            name='Произведение', year=2000, description='')
+        self.review = Review.objects.create(
+            title=self.title, author=self.author, text='Текст', score=5)
+
+    def authorize(self, user):
+        token = UserTokenObtainPairSerializer.get_token(user)['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            query for query in context.captured_queries
+            if User._meta.db_table in query['sql']
+            and 'INNER JOIN' not in query['sql']
+        ]
+
+    @override_settings(SHARED_CACHE=True)
+    def test_no_user_lookup_after_warm_up(self):
+        self.authorize(self.user)
+        self.user_queries('/api/v1/titles/')
+        self.assertEqual(self.user_queries('/api/v1/titles/'), [])
+
+    def test_permissions_use_claims(self):
+        self.authorize(self.user)
+        response = self.client.patch(
+            f'/api/v1/titles/{self.title.id}/reviews/{self.review.id}/',
+            {'text': 'Отредактировано модератором'},
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_me_returns_full_user(self):
+        self.authorize(self.user)
+        response = self.client.get('/api/v1/users/me/')
+        self.assertEqual(response.data['email'], 'm@ya.ru')
+
+    def test_revoked_token_is_rejected(self):
+        self.authorize(self.user)
+        self.client.get('/api/v1/titles/')
+        self.user.revoke_tokens()
+        self.assertEqual(self.client.get('/api/v1/titles/').status_code, 401)
+
+    def test_role_change_revokes_token(self):
+        self.authorize(self.user)
+        user = User.objects.get(pk=self.user.pk)
+        user.role = User.USER
+        user.save()
+        self.assertEqual(self.client.get('/api/v1/titles/').status_code, 401)
+
+    def test_revoked_in_other_process(self):
+        self.authorize(self.user)
+        self.client.get('/api/v1/titles/')
+        # Запись обрабатывает воркер со своим кэшем процесса.
+        with mock.patch('api.authentication.cache',
+                        LocMemCache('other-worker', {})):
+            user = User.objects.get(pk=self.user.pk)
+            user.role = User.USER
+            user.save()
+        self.assertEqual(self.client.get('/api/v1/titles/').status_code, 401)
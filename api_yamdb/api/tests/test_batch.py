@@ -0,0 +1,159 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models import AutoField, QuerySet
+from django.test import override_settings
+from rest_framework.test import APITransactionTestCase
+
+from api.batch import BatchWriteMixin
+from api.serializers import UserTokenObtainPairSerializer
+from reviews.models import Categories, Genre, Title, User
+
+
+def bulk_create_returning_ids(queryset, objs, batch_size=None,
+                              ignore_conflicts=False):
+    """bulk_create СУБД, возвращающей id вставленных строк, без сигналов"""
+    for obj in objs:
+        fields = [
+            field for field in obj._meta.concrete_fields
+            if not isinstance(field, AutoField)
+        ]
+        obj.pk = queryset._insert([obj], fields=fields, return_id=True)
+        obj._state.adding, obj._state.db = False, queryset.db
+    return objs
+
+
+class BatchWriteTest(APITransactionTestCase):
+    """Пачечное создание и изменение произведений, жанров и категорий"""
+
+    def setUp(self):
+        cache.clear()
+        Genre.objects.create(name='Рок', slug='rock')
+        Genre.objects.create(name='Джаз', slug='jazz')
+        Categories.objects.create(name='Музыка', slug='music')
+        self.admin = User.objects.create(
+            username='admin', email='a@ya.ru', role=User.ADMIN)
+        self.authorize(self.admin)
+
+    def authorize(self, user):
+        token = UserTokenObtainPairSerializer.get_token(user)['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_create_titles(self):
+        response = self.client.post('/api/v1/titles/batch/', [
+            {'name': 'Первый', 'year': 1990, 'category': 'music',
+             'genre': ['rock', 'jazz']},
+            {'name': 'Из будущего', 'year': 3000, 'category': 'music',
+             'genre': ['rock']},
+            {'name': 'Второй', 'year': 1991, 'category': 'music',
+             'genre': ['pop']},
+        ], format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [result['status'] for result in response.data], [201, 400, 400])
+        self.assertIn('year', response.data[1]['errors'])
+        self.assertIn('genre', response.data[2]['errors'])
+        title = Title.objects.get()
+        self.assertEqual(response.data[0]['data']['id'], title.id)
+        self.assertEqual(
+            sorted(title.genre.values_list('slug', flat=True)),
+            ['jazz', 'rock'])
+
+    def test_unique_slugs(self):
+        response = self.client.post('/api/v1/genres/batch/', [
+            {'name': 'Поп', 'slug': 'pop'},
+            {'name': 'Еще рок', 'slug': 'rock'},
+            {'name': 'Снова поп', 'slug': 'pop'},
+        ], format='json')
+        self.assertEqual(
+            [result['status'] for result in response.data], [201, 400, 400])
+        single = self.client.post(
+            '/api/v1/genres/', {'name': 'Еще рок', 'slug': 'rock'})
+        self.assertEqual(response.data[1]['errors'], single.data)
+        self.assertEqual(Genre.objects.count(), 3)
+
+    def test_reserved_slug(self):
+        data = {'name': 'Пачка', 'slug': 'batch'}
+        for url in ('/api/v1/genres/', '/api/v1/categories/'):
+            with self.subTest(url=url):
+                response = self.client.post(url, data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('slug', response.data)
+        response = self.client.post(
+            '/api/v1/genres/batch/', [data], format='json')
+        self.assertEqual(response.data[0]['status'], 400)
+        self.assertFalse(Genre.objects.filter(slug='batch').exists())
+        self.assertFalse(Categories.objects.filter(slug='batch').exists())
+
+    def test_update(self):
+        response = self.client.patch('/api/v1/categories/batch/', [
+            {'slug': 'music', 'name': 'Музыка и звук'},
+            {'slug': 'missing', 'name': 'Нет такой'},
+        ], format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [result['status'] for result in response.data], [200, 404])
+        self.assertEqual(
+            Categories.objects.get(slug='music').name, 'Музыка и звук')
+
+    def test_all_created(self):
+        response = self.client.post('/api/v1/categories/batch/', [
+            {'name': 'Книги', 'slug': 'books'},
+            {'name': 'Фильмы', 'slug': 'movies'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Categories.objects.count(), 3)
+
+    @override_settings(BATCH_WRITE={'MAX_ITEMS': 1})
+    def test_limits(self):
+        items = [{'name': 'Книги', 'slug': 'books'}] * 2
+        response = self.client.post(
+            '/api/v1/categories/batch/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            '/api/v1/categories/batch/', {'name': 'Книги'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_only(self):
+        self.authorize(User.objects.create(username='user', email='u@ya.ru'))
+        response = self.client.patch(
+            '/api/v1/genres/batch/', [{'slug': 'rock', 'name': 'Рок'}],
+            format='json')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(
+        API_RESPONSE_CACHE={'ENABLED': True, 'TIMEOUT': 300},
+        CONDITIONAL_GET={'ENABLED': True, 'CACHE_TIMEOUT': 300},
+    )
+    def test_bulk_create(self):
+        before = self.client.get('/api/v1/titles/')
+        self.assertEqual(before.data['count'], 0)
+        with mock.patch.object(
+            BatchWriteMixin, 'can_bulk_create', return_value=True,
+        ), mock.patch.object(
+            BatchWriteMixin, 'save_each', side_effect=AssertionError,
+        ), mock.patch.object(QuerySet, 'bulk_create',
+                             bulk_create_returning_ids):
+            response = self.client.post('/api/v1/titles/batch/', [
+                {'name': 'Первый', 'year': 1990, 'category': 'music',
+                 'genre': ['rock', 'jazz']},
+                {'name': 'Второй', 'year': 1991, 'category': 'music',
+                 'genre': ['jazz']},
+            ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(response.data[0]['data']['genre']), ['jazz', 'rock'])
+        self.assertEqual(
+            {
+                title.name: sorted(title.genre.values_list('slug', flat=True))
+                for title in Title.objects.all()
+            },
+            {'Первый': ['jazz', 'rock'], 'Второй': ['jazz']},
+        )
+        # Сигналы не отправлялись: кэши сбросил invalidate_model.
+        after = self.client.get(
+            '/api/v1/titles/', HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.data['count'], 2)
+        response = self.client.get('/api/v1/titles/', {'genre': 'rock'})
+        self.assertEqual(response.data['count'], 1)
@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from reviews.models import Review, Title, User
+
+
+class BenchmarkCommandsTest(TestCase):
+    """Генерация набора данных и замер эндпоинтов"""
+
+    def test_generate_and_measure(self):
+        admin = User.objects.create(
+            username='admin', email='a@ya.ru', role=User.ADMIN)
+        call_command('generate_dataset', scale=0.01, seed=1, stdout=StringIO())
+        call_command('generate_dataset', scale=0.01, seed=1, clear=True,
+                     stdout=StringIO())
+        self.assertEqual(Title.objects.count(), 20)
+        # --clear удаляет только созданных генератором пользователей.
+        self.assertEqual(User.objects.count(), 11)
+        self.assertTrue(User.objects.filter(pk=admin.pk).exists())
+        title = Title.objects.order_by('-reviews_count').first()
+        self.assertEqual(
+            title.reviews_count, Review.objects.filter(title=title).count())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command('bench_endpoints', iterations=2, warmup=0,
+                         output=path, stdout=StringIO())
+            with open(path, encoding='utf-8') as file:
+                results = json.load(file)
+        self.assertEqual(results['dataset']['title'], 20)
+        self.assertEqual(results['dataset']['user'], 11)
+        self.assertFalse(
+            User.objects.filter(username='bench_admin').exists())
+        titles = results['results']['titles_list']
+        self.assertEqual(titles['count'], 2)
+        self.assertGreater(titles['queries'], 0)
+        self.assertGreater(titles['peak_kb'], 0)
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITransactionTestCase
+
+from api.cache import get_response_cache_stats
+from reviews.models import Categories, Genre, Review, Title, User
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': True, 'TIMEOUT': 300})
+class ResponseCacheTest(APITransactionTestCase):
+    """Кэш ответов и его инвалидация сигналами моделей"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Categories.objects.create(name='Фильм', slug='movie')
+        self.genre = Genre.objects.create(name='Рок', slug='rock')
+        self.title = Title.objects.create(
+            name='Произведение', year=2000, description='',
+            category=self.category)
+        self.title.genre.add(self.genre)
+        self.user = User.objects.create(username='user', email='u@ya.ru')
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit_and_miss(self):
+        self.assertEqual(self.get('/api/v1/titles/')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get('/api/v1/titles/')['X-Cache'], 'HIT')
+        self.assertEqual(
+            self.get('/api/v1/titles/?page=1')['X-Cache'], 'MISS')
+        stats = get_response_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_query_params_are_normalized(self):
+        self.get('/api/v1/titles/?name=a&year=2000')
+        response = self.get('/api/v1/titles/?year=2000&name=a')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_genre_change_invalidates_titles(self):
+        url = f'/api/v1/titles/{self.title.id}/'
+        self.get(url)
+        self.genre.name = 'Джаз'
+        self.genre.save()
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['genre'][0]['name'], 'Джаз')
+
+    def test_review_invalidates_only_its_title(self):
+        other = Title.objects.create(name='Другое', year=2001, description='')
+        self.get(f'/api/v1/titles/{self.title.id}/')
+        self.get(f'/api/v1/titles/{other.id}/')
+        Review.objects.create(
+            title=self.title, author=self.user, text='Текст', score=8)
+        response = self.get(f'/api/v1/titles/{self.title.id}/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['rating'], 8)
+        response = self.get(f'/api/v1/titles/{other.id}/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_genre_link_invalidates_title(self):
+        url = f'/api/v1/titles/{self.title.id}/'
+        self.get(url)
+        self.title.genre.clear()
+        self.assertEqual(self.get(url).data['genre'], [])
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITransactionTestCase
+
+from reviews.models import Categories, Genre, Review, Title, User
+
+
+@override_settings(
+    API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0},
+    CONDITIONAL_GET={'ENABLED': True, 'CACHE_TIMEOUT': 300},
+)
+class ConditionalGetTest(APITransactionTestCase):
+    """ETag и Last-Modified для списков и объектов"""
+
+    def setUp(self):
+        cache.clear()
+        self.genre = Genre.objects.create(name='Драма', slug='drama')
+        category = Categories.objects.create(name='Книги', slug='books')
+        self.title = Title.objects.create(
+            name='Идиот', year=1869, description='', category=category)
+        self.title.genre.set([self.genre])
+        self.user = User.objects.create(username='reader', email='r@ya.ru')
+        self.review = Review.objects.create(
+            title=self.title, author=self.user, text='Отзыв', score=7)
+        self.titles_url = '/api/v1/titles/'
+        self.title_url = f'/api/v1/titles/{self.title.id}/'
+        self.reviews_url = f'/api/v1/titles/{self.title.id}/reviews/'
+
+    def test_not_modified_before_main_query(self):
+        response = self.client.get(self.titles_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        # Агрегаты произведений, жанров и категорий уже в кэше.
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.titles_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_if_modified_since_ignored(self):
+        last_modified = self.client.get(self.reviews_url)['Last-Modified']
+        # Удаление не сдвигает максимум updated_at.
+        self.review.delete()
+        response = self.client.get(
+            self.reviews_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+    def test_etag_depends_on_params(self):
+        first = self.client.get(self.titles_url)
+        second = self.client.get(self.titles_url, {'year_min': 1800})
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def rename_user(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'renamed'
+        user.save()
+
+    def test_changes_invalidate_etag(self):
+        other = User.objects.create(username='other', email='o@ya.ru')
+        changes = (
+            (self.titles_url, lambda: Genre.objects.get(
+                pk=self.genre.pk).save()),
+            (self.title_url, lambda: Review.objects.create(
+                title=self.title, author=other, text='Еще', score=1)),
+            (self.title_url, lambda: self.title.genre.remove(self.genre)),
+            (self.reviews_url, self.rename_user),
+            (self.reviews_url, lambda: Review.objects.get(
+                author=self.user).delete()),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_object(self):
+        response = self.client.get('/api/v1/titles/0/')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,61 @@
+import threading
+from unittest import TestCase
+
+from api_yamdb.db.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+        self.usable = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(TestCase):
+    """Пул соединений api_yamdb.db.postgresql_pool"""
+
+    def make_pool(self, **kwargs):
+        kwargs.setdefault('check', lambda connection: connection.usable)
+        return ConnectionPool(FakeConnection, **kwargs)
+
+    def test_connections_are_reused(self):
+        pool = self.make_pool(max_size=2)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.stats()['created'], 1)
+
+    def test_overflow_connections_are_closed_on_release(self):
+        pool = self.make_pool(max_size=1, overflow=1)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(second)
+        pool.release(first)
+        self.assertTrue(second.closed)
+        self.assertFalse(first.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_broken_connection_is_replaced(self):
+        pool = self.make_pool(max_size=1)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.usable = False
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_waits_for_release_and_times_out(self):
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        connection = pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+        timer = threading.Timer(0.01, pool.release, (connection,))
+        pool.timeout = 5
+        timer.start()
+        self.assertIs(pool.acquire(), connection)
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['timeouts']), (2, 1))
+        self.assertGreater(stats['wait_time'], 0)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from reviews.models import OutgoingEmail
+
+
+class EmailOutboxTest(APITestCase):
+    """Код подтверждения отправляется через очередь исходящих"""
+
+    def signup(self):
+        response = self.client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'user', 'email': 'user@ya.ru'},
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_signup_enqueues_email(self):
+        self.signup()
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.recipients, 'user@ya.ru')
+        call_command('send_emails', once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@ya.ru'])
+        email.refresh_from_db()
+        self.assertIsNotNone(email.sent_at)
+
+    def test_failed_email_is_retried_later(self):
+        self.signup()
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=ConnectionError('smtp down'),
+        ):
+            call_command('send_emails', once=True, stderr=mock.Mock())
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNone(email.sent_at)
+        self.assertIn('smtp down', email.last_error)
+        call_command('send_emails', once=True)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_crash_keeps_sent_emails(self):
+        for number in range(2):
+            OutgoingEmail.objects.create(
+                subject='Тема', body='Текст', from_email='from@ya.ru',
+                recipients=f'user{number}@ya.ru')
+        backend = 'django.core.mail.backends.locmem.EmailBackend'
+        send_messages = mail.get_connection(backend).send_messages
+
+        def send_then_crash(messages):
+            if mail.outbox:
+                raise KeyboardInterrupt
+            return send_messages(messages)
+
+        with mock.patch(f'{backend}.send_messages',
+                        side_effect=send_then_crash):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('send_emails', once=True)
+        self.assertEqual(
+            OutgoingEmail.objects.filter(sent_at__isnull=False).count(), 1)
+        # Неотправленное письмо закреплено за упавшим процессом до конца
+        # срока аренды.
+        call_command('send_emails', once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        OutgoingEmail.objects.filter(sent_at__isnull=True).update(
+            send_after=timezone.now())
+        call_command('send_emails', once=True)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['user0@ya.ru', 'user1@ya.ru'])
+        self.assertFalse(
+            OutgoingEmail.objects.filter(sent_at__isnull=True).exists())
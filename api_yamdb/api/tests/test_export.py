@@ -0,0 +1,84 @@
+import io
+import json
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITransactionTestCase
+
+from api.serializers import UserTokenObtainPairSerializer
+from reviews.models import Categories, Comment, Genre, Review, Title, User
+
+
+class ExportTest(APITransactionTestCase):
+    """Выгрузка в NDJSON и CSV в формате install_bd"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(
+            username='admin', email='a@ya.ru', role=User.ADMIN)
+        category = Categories.objects.create(name='Музыка', slug='music')
+        genre = Genre.objects.create(name='Рок', slug='rock')
+        self.title = Title.objects.create(
+            name='Альбом', year=1990, description='Описание',
+            category=category)
+        self.title.genre.set([genre])
+        review = Review.objects.create(
+            title=self.title, author=self.admin, text='Отзыв', score=7)
+        Comment.objects.create(review=review, author=self.admin, text='Да')
+        token = UserTokenObtainPairSerializer.get_token(self.admin)['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def snapshot(self):
+        return {
+            'titles': list(Title.objects.values_list(
+                'id', 'name', 'year', 'category_id', 'rating')),
+            'genres': list(Title.genre.through.objects.values_list(
+                'title_id', 'genre_id')),
+            'reviews': list(Review.objects.values_list(
+                'id', 'title_id', 'author_id', 'score', 'text', 'pub_date')),
+            'comments': list(Comment.objects.values_list(
+                'id', 'review_id', 'author_id', 'text', 'pub_date')),
+        }
+
+    def test_csv_round_trip(self):
+        before = self.snapshot()
+        data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_dir)
+        call_command('export_bd', data_dir=data_dir, chunk_size=1,
+                     stdout=io.StringIO())
+        for model in (Comment, Review, Title, Genre, Categories, User):
+            model.objects.all().delete()
+        call_command('install_bd', data_dir=data_dir,
+                     stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), before)
+
+    def test_ndjson(self):
+        response = self.client.get('/api/v1/export/?file=titles,review')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual([line['file'] for line in lines],
+                         ['titles', 'review'])
+        self.assertEqual(lines[0]['category'], self.title.category_id)
+
+    def test_csv(self):
+        response = self.client.get('/api/v1/export/?output=csv&file=genre')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            b''.join(response.streaming_content).decode().splitlines(),
+            ['id,name,slug', f'{Genre.objects.get().id},Рок,rock'])
+
+    def test_invalid(self):
+        for query in ('output=xml', 'file=secret', 'output=csv'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/v1/export/?{query}')
+                self.assertEqual(response.status_code, 400)
+
+    def test_admin_only(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/v1/export/').status_code, 401)
@@ -0,0 +1,56 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from reviews.models import Categories, Genre, Title
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0})
+class TitleFiltersTest(APITestCase):
+    """Точные фильтры произведений по жанрам, категориям и годам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        rock, jazz, drama, melodrama = (
+            Genre.objects.create(name=slug, slug=slug)
+            for slug in ('rock', 'jazz', 'drama', 'melodrama')
+        )
+        music = Categories.objects.create(name='Музыка', slug='music')
+        movie = Categories.objects.create(name='Фильмы', slug='movie')
+        cls.rock = Title.objects.create(
+            name='Рок', year=1970, description='', category=music)
+        cls.fusion = Title.objects.create(
+            name='Фьюжн', year=1980, description='', category=music)
+        cls.drama = Title.objects.create(
+            name='Драма', year=1990, description='', category=movie)
+        cls.melodrama = Title.objects.create(
+            name='Мелодрама', year=2000, description='')
+        cls.rock.genre.set([rock])
+        cls.fusion.genre.set([rock, jazz])
+        cls.drama.genre.set([drama])
+        cls.melodrama.genre.set([melodrama])
+
+    def get_ids(self, query):
+        response = self.client.get(f'/api/v1/titles/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['id'] for item in response.data['results'])
+
+    def test_slug_is_matched_exactly(self):
+        self.assertEqual(self.get_ids('genre=drama'), [self.drama.id])
+
+    def test_any_and_all_genres(self):
+        self.assertEqual(
+            self.get_ids('genre=rock,jazz'), [self.rock.id, self.fusion.id])
+        self.assertEqual(
+            self.get_ids('genre=rock,jazz&genre_match=all'),
+            [self.fusion.id])
+        self.assertEqual(
+            self.get_ids('genre=rock,missing&genre_match=all'), [])
+
+    def test_categories_and_year_range(self):
+        self.assertEqual(
+            self.get_ids('category=music,movie&year_min=1980&year_max=1990'),
+            [self.fusion.id, self.drama.id])
+
+    def test_invalid_match_mode(self):
+        response = self.client.get('/api/v1/titles/?genre_match=some')
+        self.assertEqual(response.status_code, 400)
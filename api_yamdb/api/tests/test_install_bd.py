@@ -0,0 +1,71 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from api.management.commands.install_bd import Checkpoint
+from reviews.models import Categories, Comment, Genre, Review, Title, User
+
+
+class ResumeTest(TransactionTestCase):
+    """Повторный запуск install_bd после сбоя"""
+
+    def setUp(self):
+        category = Categories.objects.create(name='Музыка', slug='music')
+        genre = Genre.objects.create(name='Рок', slug='rock')
+        for number in range(5):
+            user = User.objects.create(
+                username=f'user{number}', email=f'user{number}@ya.ru')
+            title = Title.objects.create(
+                name=f'Альбом {number}', year=1990, description='',
+                category=category)
+            title.genre.set([genre])
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=number + 1)
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        call_command('export_bd', data_dir=self.data_dir,
+                     stdout=io.StringIO())
+        self.counts = self.get_counts()
+        for model in (Comment, Review, Title, Genre, Categories, User):
+            model.objects.all().delete()
+
+    def get_counts(self):
+        return [
+            model.objects.count()
+            for model in (User, Title, Title.genre.through, Review)
+        ]
+
+    def install(self):
+        # Части больше пачек: каждая часть вставляется несколькими пачками.
+        call_command('install_bd', data_dir=self.data_dir, chunk_size=4,
+                     batch_size=2, stdout=io.StringIO())
+
+    def test_crash_before_first_mark(self):
+        with mock.patch.object(
+            Checkpoint, 'mark', side_effect=RuntimeError('сбой'),
+        ), self.assertRaises(RuntimeError):
+            self.install()
+        self.assertTrue(User.objects.exists())
+        self.install()
+        self.assertEqual(self.get_counts(), self.counts)
+
+    def test_resume_marked_chunks(self):
+        calls = []
+        mark = Checkpoint.mark
+
+        def mark_then_fail(checkpoint, name, chunk):
+            calls.append(name)
+            if len(calls) == 3:
+                raise RuntimeError('сбой')
+            mark(checkpoint, name, chunk)
+
+        with mock.patch.object(
+            Checkpoint, 'mark', mark_then_fail,
+        ), self.assertRaises(RuntimeError):
+            self.install()
+        self.install()
+        self.assertEqual(self.get_counts(), self.counts)
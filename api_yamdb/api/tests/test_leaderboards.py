@@ -0,0 +1,107 @@
+import importlib
+import io
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITransactionTestCase
+
+from reviews.models import Categories, Genre, Review, Title, TitleRanking, User
+
+backfill = importlib.import_module('reviews.migrations.0009_title_ranking')
+
+
+class LeaderboardTest(APITransactionTestCase):
+    """Таблицы лидеров: инкрементальное обновление и чтение"""
+
+    def setUp(self):
+        cache.clear()
+        self.rock = Genre.objects.create(name='Рок', slug='rock')
+        self.jazz = Genre.objects.create(name='Джаз', slug='jazz')
+        self.music = Categories.objects.create(name='Музыка', slug='music')
+        self.users = [
+            User.objects.create(username=f'user{number}',
+                                email=f'user{number}@ya.ru')
+            for number in range(3)
+        ]
+        self.first = self.create_title('Первый', 1990, [self.rock])
+        self.second = self.create_title('Второй', 1991, [self.rock])
+        self.unrated = self.create_title('Без отзывов', 1990, [self.rock])
+        self.review = self.add_reviews(self.first, 9)[0]
+        self.add_reviews(self.second, 7, 8)
+
+    def create_title(self, name, year, genres):
+        title = Title.objects.create(
+            name=name, year=year, description='', category=self.music)
+        title.genre.set(genres)
+        return title
+
+    def add_reviews(self, title, *scores):
+        return [
+            Review.objects.create(
+                title=title, author=user, text='Текст', score=score)
+            for user, score in zip(self.users, scores)
+        ]
+
+    def board(self, url):
+        response = self.client.get(f'/api/v1/leaderboards/{url}')
+        self.assertEqual(response.status_code, 200)
+        return [
+            (row['title']['name'], row['score']) for row in response.data
+        ]
+
+    def rows(self):
+        return sorted(TitleRanking.objects.values_list(
+            'board', 'title_id', 'score', 'reviews_count'))
+
+    def test_boards(self):
+        expected = [('Первый', 9), ('Второй', 7)]
+        self.assertEqual(self.board('top/'), expected)
+        self.assertEqual(self.board('genres/rock/'), expected)
+        self.assertEqual(self.board('categories/music/'), expected)
+        self.assertEqual(self.board('years/1991/'), [('Второй', 7)])
+        self.assertEqual(self.board('genres/jazz/'), [])
+        self.assertEqual(self.board('trending/'), [('Второй', 2),
+                                                   ('Первый', 1)])
+
+    def test_incremental(self):
+        self.review.score = 1
+        self.review.save()
+        self.second.genre.set([self.jazz])
+        self.assertEqual(self.board('top/'), [('Второй', 7), ('Первый', 1)])
+        self.assertEqual(self.board('genres/jazz/'), [('Второй', 7)])
+        self.assertEqual(self.board('genres/rock/'), [('Первый', 1)])
+        self.review.delete()
+        self.assertEqual(self.board('top/?limit=1'), [('Второй', 7)])
+        self.assertEqual(self.board('trending/'), [('Второй', 2)])
+        incremental = self.rows()
+        call_command('refresh_leaderboards', stdout=io.StringIO())
+        self.assertEqual(self.rows(), incremental)
+
+    def test_trending_window(self):
+        Review.objects.filter(title=self.second).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        call_command('refresh_leaderboards', trending_only=True,
+                     stdout=io.StringIO())
+        self.assertEqual(self.board('trending/'), [('Первый', 1)])
+
+    def test_migration_backfill(self):
+        incremental = self.rows()
+        TitleRanking.objects.all().delete()
+        backfill.fill_rankings(apps, None)
+        self.assertEqual(self.rows(), incremental)
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/v1/leaderboards/years/1990/')
+
+    def test_errors(self):
+        response = self.client.get('/api/v1/leaderboards/genres/pop/')
+        self.assertEqual(response.status_code, 404)
+        for limit in ('0', 'x', '²', '1000'):
+            with self.subTest(limit=limit):
+                response = self.client.get(
+                    f'/api/v1/leaderboards/top/?limit={limit}')
+                self.assertEqual(response.status_code, 400)
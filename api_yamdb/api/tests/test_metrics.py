@@ -0,0 +1,79 @@
+import sys
+import types
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+
+from api import metrics
+from reviews.models import Title
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': True, 'TIMEOUT': 300})
+class MetricsTest(APITestCase):
+    """Метрики Prometheus по маршрутам api/urls.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, description='')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_latency_queries_and_cache(self):
+        route = {'route': 'api:titles-detail'}
+        requests = sample(
+            'api_request_duration_seconds_count', method='GET', **route)
+        queries = sample('api_db_queries_per_request_sum', **route)
+        misses = sample('api_response_cache_requests_total',
+                        namespace='titles', result='miss')
+        hits = sample('api_response_cache_requests_total',
+                      namespace='titles', result='hit')
+        for _ in range(2):
+            self.client.get(f'/api/v1/titles/{self.title.id}/')
+        self.assertEqual(sample(
+            'api_request_duration_seconds_count', method='GET', **route),
+            requests + 2)
+        self.assertGreater(
+            sample('api_db_queries_per_request_sum', **route), queries)
+        self.assertEqual(sample(
+            'api_response_cache_requests_total',
+            namespace='titles', result='miss'), misses + 1)
+        self.assertEqual(sample(
+            'api_response_cache_requests_total',
+            namespace='titles', result='hit'), hits + 1)
+
+    def test_errors_and_scrape(self):
+        labels = {'route': 'api:titles-detail', 'method': 'GET',
+                  'status': '404'}
+        errors = sample('api_request_errors_total', **labels)
+        self.client.get('/api/v1/titles/0/')
+        self.assertEqual(
+            sample('api_request_errors_total', **labels), errors + 1)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'api_request_duration_seconds_bucket', response.content)
+
+    def test_pool_waits_are_counters(self):
+        backend = types.ModuleType('api_yamdb.db.postgresql_pool.base')
+        labels = {'alias': 'metrics-test', 'kind': 'waits'}
+        before = sample('api_db_pool_waits_total', **labels)
+        with mock.patch.dict(
+            sys.modules, {'api_yamdb.db.postgresql_pool.base': backend},
+        ):
+            for waits in (3, 5, 2):
+                backend.get_pool_stats = lambda waits=waits: {
+                    'metrics-test': {'in_use': 1, 'idle': 0,
+                                     'waits': waits, 'timeouts': 0},
+                }
+                metrics.observe_pools()
+        # 3, затем прирост 2, затем пул создан заново и насчитал 2.
+        self.assertEqual(
+            sample('api_db_pool_waits_total', **labels), before + 7)
@@ -0,0 +1,97 @@
+import base64
+import json
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from reviews.models import Genre, Review, Title, User
+
+
+class CursorPaginationTest(APITestCase):
+    """Курсорный режим пагинации отзывов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, description='')
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'{i}@ya.ru')
+            for i in range(13)
+        ]
+        for user in cls.users[:12]:
+            Review.objects.create(
+                title=cls.title, author=user, text='Текст', score=5)
+
+    def test_walk_is_stable_under_inserts(self):
+        url = f'/api/v1/titles/{self.title.id}/reviews/?pagination=cursor'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(item['id'] for item in response.data['results'])
+            if len(seen) == 5:
+                Review.objects.create(
+                    title=self.title, author=self.users[12],
+                    text='Новый', score=1)
+            url = response.data['next']
+        expected = list(
+            Review.objects.filter(title=self.title)
+            .exclude(author=self.users[12])
+            .order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            f'/api/v1/titles/{self.title.id}/reviews/?cursor=broken')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_value_types(self):
+        reviews = f'/api/v1/titles/{self.title.id}/reviews/'
+        for url, position in (
+            ('/api/v1/titles/', ['abc']),
+            ('/api/v1/titles/', [{'a': 1}]),
+            ('/api/v1/titles/', [None]),
+            (reviews, ['notadate', 1]),
+            (reviews, [1, 'x']),
+            (reviews, ['2020-01-01T00:00:00+00:00', [1]]),
+        ):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(position).encode()).decode()
+            with self.subTest(url=url, position=position):
+                response = self.client.get(f'{url}?cursor={cursor}')
+                self.assertEqual(response.status_code, 404)
+
+    def test_page_number_mode_by_default(self):
+        response = self.client.get(f'/api/v1/titles/{self.title.id}/reviews/')
+        self.assertEqual(response.data['count'], 12)
+
+
+@override_settings(
+    PAGINATION_COUNT={
+        'STRATEGY': 'cached', 'CACHE_TIMEOUT': 60, 'ESTIMATE_THRESHOLD': 0},
+    API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0},
+)
+class CachedCountTest(APITransactionTestCase):
+    """Кэшированный count инвалидируется при создании и удалении"""
+
+    def setUp(self):
+        cache.clear()
+        Genre.objects.create(name='Рок', slug='rock')
+
+    def get_count(self):
+        response = self.client.get('/api/v1/genres/')
+        self.assertTrue(response.data['count_exact'])
+        return response.data['count']
+
+    def test_count_is_cached_and_invalidated(self):
+        self.assertEqual(self.get_count(), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_count(), 1)
+        genre = Genre.objects.create(name='Джаз', slug='jazz')
+        self.assertEqual(self.get_count(), 2)
+        genre.delete()
+        self.assertEqual(self.get_count(), 1)
@@ -0,0 +1,81 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from reviews.models import Categories, Comment, Genre, Review, Title, User
+
+
+@override_settings(
+    API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0},
+    CONDITIONAL_GET={'ENABLED': False, 'CACHE_TIMEOUT': 0},
+)
+class QueryBudgetTest(APITestCase):
+    """Количество запросов к БД не зависит от размера страницы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Categories.objects.create(name='Фильм', slug='movie')
+        cls.genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(3)
+        ]
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'{i}@ya.ru')
+            for i in range(5)
+        ]
+        cls.title = cls.create_title(0)
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.users[0], text='Текст', score=5)
+        Comment.objects.create(
+            review=cls.review, author=cls.users[0], text='Комментарий')
+
+    @classmethod
+    def create_title(cls, number):
+        title = Title.objects.create(
+            name=f'Произведение {number}', year=2000, description='',
+            category=cls.category)
+        title.genre.set(cls.genres)
+        return title
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assert_constant_queries(self, url, grow):
+        before = self.count_queries(url)
+        grow()
+        after = self.count_queries(url)
+        self.assertEqual(
+            before, after,
+            f'Число запросов к {url} растет с размером страницы'
+        )
+
+    def test_titles_list(self):
+        self.assert_constant_queries(
+            '/api/v1/titles/',
+            lambda: [self.create_title(i) for i in range(1, 5)],
+        )
+
+    def test_reviews_list(self):
+        self.assert_constant_queries(
+            f'/api/v1/titles/{self.title.id}/reviews/',
+            lambda: [
+                Review.objects.create(
+                    title=self.title, author=user, text='Текст', score=7)
+                for user in self.users[1:]
+            ],
+        )
+
+    def test_comments_list(self):
+        self.assert_constant_queries(
+            f'/api/v1/titles/{self.title.id}/reviews/'
+            f'{self.review.id}/comments/',
+            lambda: [
+                Comment.objects.create(
+                    review=self.review, author=user, text='Комментарий')
+                for user in self.users[1:]
+            ],
+        )
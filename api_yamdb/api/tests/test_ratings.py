@@ -0,0 +1,76 @@
+import importlib
+import io
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db.models import Avg, Count
+from django.test import TestCase
+
+from reviews.models import Review, Title, User
+
+backfill = importlib.import_module(
+    'reviews.migrations.0002_title_rating_aggregates')
+
+
+class RatingTest(TestCase):
+    """Инкрементальный рейтинг совпадает с Avg по отзывам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = Title.objects.create(name='Первый', year=1990,
+                                         description='')
+        cls.second = Title.objects.create(name='Второй', year=1991,
+                                          description='')
+        cls.users = [
+            User.objects.create(username=f'user{number}',
+                                email=f'user{number}@ya.ru')
+            for number in range(3)
+        ]
+
+    def review(self, title, user, score):
+        return Review.objects.create(
+            title=title, author=self.users[user], text='Текст', score=score)
+
+    def assert_matches_avg(self):
+        expected = {
+            pk: (None if avg is None else int(avg), count)
+            for pk, avg, count in Title.objects.annotate(
+                avg=Avg('reviews__score'), count=Count('reviews'),
+            ).values_list('pk', 'avg', 'count')
+        }
+        actual = {
+            pk: (rating, count)
+            for pk, rating, count in Title.objects.values_list(
+                'pk', 'rating', 'reviews_count')
+        }
+        self.assertEqual(actual, expected)
+
+    def test_incremental(self):
+        review = self.review(self.first, 0, 9)
+        self.review(self.first, 1, 4)
+        self.assert_matches_avg()
+        review.score = 2
+        review.save()
+        self.assert_matches_avg()
+        review.title = self.second
+        review.save()
+        self.assert_matches_avg()
+        review.delete()
+        self.assert_matches_avg()
+        self.second.refresh_from_db()
+        self.assertIsNone(self.second.rating)
+
+    def test_rebuild_command(self):
+        self.review(self.first, 0, 7)
+        self.review(self.first, 1, 10)
+        self.review(self.second, 2, 3)
+        Title.objects.update(rating=1, reviews_count=0, score_sum=0)
+        call_command('rebuild_ratings', stdout=io.StringIO())
+        self.assert_matches_avg()
+
+    def test_migration_backfill(self):
+        self.review(self.first, 0, 6)
+        self.review(self.first, 1, 9)
+        Title.objects.update(rating=3, reviews_count=0, score_sum=0)
+        backfill.fill_rating_aggregates(apps, None)
+        self.assert_matches_avg()
@@ -0,0 +1,73 @@
+from django.db.models import Prefetch
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api import readers, serializers
+from reviews.models import Categories, Comment, Genre, Review, Title, User
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0})
+class FastReadParityTest(APITestCase):
+    """Быстрые списки совпадают с выводом сериализаторов побайтно"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Книги', slug='books')
+        genres = [
+            Genre.objects.create(name=f'Жанр «{i}»', slug=f'genre-{i}')
+            for i in range(3)
+        ]
+        users = [
+            User.objects.create(username=f'user{i}', email=f'{i}@ya.ru')
+            for i in range(7)
+        ]
+        cls.title = Title.objects.create(
+            name='Название "с кавычками"', year=1999,
+            description='Описание\nв две строки', category=category)
+        cls.title.genre.set([genres[2], genres[0]])
+        Title.objects.create(name='Без категории', year=2001, description='')
+        for number, user in enumerate(users):
+            review = Review.objects.create(
+                title=cls.title, author=user, text=f'Отзыв {number}',
+                score=number + 1)
+            Comment.objects.create(review=review, author=users[0], text='Да')
+        cls.review = review
+
+    def assert_same(self, reader_class, serializer_class, queryset):
+        reader = reader_class()
+        expected = serializer_class(list(queryset), many=True).data
+        actual = reader.to_representation(list(reader.values(queryset)))
+        self.assertEqual(
+            JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_titles(self):
+        self.assert_same(
+            readers.TitleReader, serializers.TitlesSerializer,
+            Title.objects.select_related('category').prefetch_related(
+                Prefetch('genre', queryset=Genre.objects.order_by('id'))
+            ).order_by('id'))
+
+    def test_reviews_and_comments(self):
+        self.assert_same(
+            readers.ReviewReader, serializers.ReviewSerializer,
+            self.title.reviews.select_related('author'))
+        self.assert_same(
+            readers.CommentReader, serializers.CommentSerializer,
+            Comment.objects.select_related('author'))
+
+    def test_endpoints_match_serializers(self):
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{self.title.id}/reviews/',
+            f'/api/v1/titles/{self.title.id}/reviews/?pagination=cursor',
+            f'/api/v1/titles/{self.title.id}/reviews/{self.review.id}'
+            '/comments/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                fast = self.client.get(url)
+                with override_settings(API_FAST_READ=False):
+                    slow = self.client.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, slow.content)
@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITransactionTestCase
+
+from api.relations import resolve_slugs
+from api.serializers import UserTokenObtainPairSerializer
+from reviews.models import Categories, Genre, Title, User
+
+
+class TitleWriteTest(APITransactionTestCase):
+    """Слаги жанров разрешаются одним запросом, жанры меняются разницей"""
+
+    def setUp(self):
+        cache.clear()
+        self.genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(6)
+        ]
+        Categories.objects.create(name='Книги', slug='books')
+        admin = User.objects.create(
+            username='admin', email='a@ya.ru', role=User.ADMIN)
+        token = UserTokenObtainPairSerializer.get_token(admin)['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def post_title(self, slugs):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/v1/titles/', {
+                'name': 'Произведение', 'year': 2000,
+                'genre': slugs, 'category': 'books',
+            })
+        self.assertEqual(response.status_code, 201, response.data)
+        lookups = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'reviews_title_genre' not in query['sql']
+            and ('"reviews_genre"."slug"' in query['sql']
+                 or '"reviews_categories"."slug"' in query['sql'])
+        ]
+        return response, lookups
+
+    @override_settings(SHARED_CACHE=True)
+    def test_slugs_resolved_in_bulk(self):
+        slugs = [genre.slug for genre in self.genres]
+        response, lookups = self.post_title(slugs)
+        # Жанры и категория, по одному запросу на модель.
+        self.assertEqual(len(lookups), 2, lookups)
+        self.assertEqual(
+            sorted(response.data['genre']), sorted(slugs))
+        _, lookups = self.post_title(slugs)
+        self.assertEqual(lookups, [])
+
+    def test_unknown_slug(self):
+        response = self.client.post('/api/v1/titles/', {
+            'name': 'Произведение', 'year': 2000,
+            'genre': ['genre-0', 'missing'], 'category': 'books',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('genre', response.data)
+
+    def test_patch_applies_difference(self):
+        response, _ = self.post_title(['genre-0', 'genre-1', 'genre-2'])
+        title = Title.objects.get(pk=response.data['id'])
+        through = Title.genre.through.objects.filter(title=title)
+        kept = through.get(genre__slug='genre-1').pk
+        response = self.client.patch(
+            f'/api/v1/titles/{title.id}/',
+            {'genre': ['genre-1', 'genre-2', 'genre-3']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(response.data['genre']), ['genre-1', 'genre-2', 'genre-3'])
+        self.assertEqual(through.get(genre__slug='genre-1').pk, kept)
+
+    def test_renamed_slug_invalidates_cache(self):
+        self.post_title(['genre-0'])
+        genre = self.genres[0]
+        genre.slug = 'renamed'
+        genre.save()
+        response = self.client.post('/api/v1/titles/', {
+            'name': 'Произведение', 'year': 2000,
+            'genre': ['genre-0'], 'category': 'books',
+        })
+        self.assertEqual(response.status_code, 400)
+        response, _ = self.post_title(['renamed'])
+        self.assertEqual(response.data['genre'], ['renamed'])
+
+    def test_deleted_in_other_process(self):
+        genre = self.genres[5]
+        resolve_slugs(Genre, [genre.slug])
+        # Удаление без сигналов: поколение этого процесса не сдвигается.
+        Genre.objects.filter(pk=genre.pk)._raw_delete(Genre.objects.db)
+        response = self.client.post('/api/v1/titles/', {
+            'name': 'Произведение', 'year': 2000,
+            'genre': [genre.slug], 'category': 'books',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('genre', response.data)
@@ -0,0 +1,76 @@
+import gzip
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import skipIf, skipUnless
+
+from django.test import override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api import middleware, renderers
+from reviews.models import Title
+
+
+class FastJSONRendererTest(APITestCase):
+    """FastJSONRenderer выдает те же байты, что и JSONRenderer"""
+
+    data = OrderedDict([
+        ('date', datetime(2021, 5, 1, 12, 30, 1, 123456, timezone.utc)),
+        ('lazy', gettext_lazy('Ошибка')),
+        ('decimal', Decimal('1.5')),
+        ('text', 'Строка «в кавычках»\u2028и \\ "escape"'),
+        ('numbers', [1, 2.5, None, True]),
+        (1, {'nested': ()}),
+    ])
+
+    @skipIf(renderers.orjson is None, 'orjson не установлен')
+    def test_same_bytes_as_json_renderer(self):
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data))
+
+    def test_indent_uses_json_renderer(self):
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type))
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0})
+class CompressionTest(APITestCase):
+    """Сжатие ответов по Accept-Encoding с порогом размера"""
+
+    url = '/api/v1/titles/'
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(5):
+            Title.objects.create(
+                name=f'Произведение {number}', year=2000,
+                description='Длинное описание ' * 20)
+
+    def test_gzip(self):
+        plain = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    @skipUnless(middleware.brotli, 'brotli не установлен')
+    def test_brotli_preferred(self):
+        plain = self.client.get(self.url)
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            middleware.brotli.decompress(response.content), plain.content)
+
+    def test_not_accepted_or_small(self):
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.client.get(
+            '/api/v1/genres/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
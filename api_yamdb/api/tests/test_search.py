@@ -0,0 +1,39 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from api.search import get_terms, to_prefix_tsquery
+from reviews.models import Title
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0})
+class TitleSearchTest(APITestCase):
+    """Поиск произведений по ?search="""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.exact = Title.objects.create(
+            name='Дюна', year=1965, description='Роман')
+        cls.prefix = Title.objects.create(
+            name='Дюна: Мессия', year=1969, description='Продолжение')
+        cls.description = Title.objects.create(
+            name='Фильм', year=2021, description='Экранизация романа Дюна')
+        Title.objects.create(name='Солярис', year=1961, description='Роман')
+
+    def test_results_ordered_by_relevance(self):
+        response = self.client.get('/api/v1/titles/?search=дюна')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [self.exact.id, self.prefix.id, self.description.id],
+        )
+
+    def test_all_words_required(self):
+        response = self.client.get('/api/v1/titles/?search=дюна мессия')
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [self.prefix.id],
+        )
+
+    def test_tsquery_has_no_operators_from_input(self):
+        terms = get_terms("дюна & !(x) | 'y':*")
+        self.assertEqual(to_prefix_tsquery(terms), 'дюна:* & x:* & y:*')
@@ -0,0 +1,84 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.filter import MAX_IDS
+from reviews.models import Categories, Genre, Review, Title, User
+
+
+@override_settings(
+    API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0},
+    CONDITIONAL_GET={'ENABLED': False, 'CACHE_TIMEOUT': 0},
+)
+class SparseFieldsetTest(APITestCase):
+    """?fields= и ?ids= для чтения произведений, отзывов и комментариев"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Книги', slug='books')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        cls.titles = []
+        for number in range(7):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=1900 + number,
+                description='Длинное описание', category=category)
+            title.genre.set([genre])
+            cls.titles.append(title)
+        user = User.objects.create(username='reader', email='r@ya.ru')
+        Review.objects.create(
+            title=cls.titles[0], author=user, text='Текст', score=5)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response, ' '.join(
+            query['sql'] for query in context.captured_queries)
+
+    def test_titles(self):
+        for fast_read in (True, False):
+            with self.subTest(fast_read=fast_read), override_settings(
+                    API_FAST_READ=fast_read):
+                response, sql = self.get('/api/v1/titles/?fields=name,year')
+                self.assertEqual(
+                    response.data['results'][0],
+                    {'name': 'Произведение 0', 'year': 1900})
+                self.assertNotIn('reviews_genre', sql)
+                self.assertNotIn('reviews_categories', sql)
+                self.assertNotIn('"description"', sql)
+
+    def test_title_detail(self):
+        response, sql = self.get(
+            f'/api/v1/titles/{self.titles[1].id}/?fields=id,category')
+        self.assertEqual(
+            response.data,
+            {'id': self.titles[1].id,
+             'category': {'name': 'Книги', 'slug': 'books'}})
+        self.assertNotIn('reviews_genre', sql)
+
+    def test_reviews(self):
+        response, sql = self.get(
+            f'/api/v1/titles/{self.titles[0].id}/reviews/'
+            '?fields=text,score&pagination=cursor')
+        self.assertEqual(
+            response.data['results'], [{'text': 'Текст', 'score': 5}])
+        self.assertNotIn('reviews_user', sql)
+
+    def test_unknown_field(self):
+        response = self.client.get('/api/v1/titles/?fields=name,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+
+    def test_ids(self):
+        wanted = [self.titles[6].id, self.titles[2].id, self.titles[5].id]
+        response, _ = self.get(
+            f'/api/v1/titles/?ids={",".join(map(str, wanted))}&fields=id')
+        self.assertEqual(response.data, [{'id': pk} for pk in sorted(wanted)])
+
+    def test_invalid_ids(self):
+        for ids in ('', ',', '1,x', '²', '1' * 19,
+                    ','.join(map(str, range(1, MAX_IDS + 2)))):
+            with self.subTest(ids=ids[:10]):
+                response = self.client.get(f'/api/v1/titles/?ids={ids}')
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,37 @@
+import json
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from reviews.models import Title
+
+
+@override_settings(
+    SERVER_TIMING={'ENABLED': True, 'SAMPLE_RATE': 1.0},
+    API_RESPONSE_CACHE={'ENABLED': False, 'TIMEOUT': 0},
+)
+class ServerTimingTest(APITestCase):
+    """Заголовок Server-Timing и строка лога api.timing"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, description='')
+
+    def test_header_and_log_line(self):
+        with self.assertLogs('api.timing', 'INFO') as logs:
+            response = self.client.get(f'/api/v1/titles/{self.title.id}/')
+        header = response['Server-Timing']
+        for stage in ('db', 'serialize', 'render', 'total'):
+            self.assertIn(f'{stage};dur=', header)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'TitlesList')
+        self.assertEqual(line['action'], 'retrieve')
+        self.assertGreater(line['queries'], 0)
+        self.assertGreater(line['serialize_ms'], 0)
+        self.assertIn(f'desc="{line["queries"]} queries"', header)
+
+    @override_settings(SERVER_TIMING={'ENABLED': True, 'SAMPLE_RATE': 0.0})
+    def test_unsampled_request_is_not_measured(self):
+        response = self.client.get('/api/v1/titles/')
+        self.assertNotIn('Server-Timing', response)
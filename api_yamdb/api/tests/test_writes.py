@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITransactionTestCase
+
+from api.serializers import UserTokenObtainPairSerializer
+from reviews.models import Review, Title, User
+
+
+# Версия токена кэшируется только в общем кэше.
+@override_settings(SHARED_CACHE=True)
+class WritePathTest(APITransactionTestCase):
+    """Создание отзыва и комментария за минимум запросов"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='author', email='a@ya.ru')
+        self.title = Title.objects.create(
+            name='Произведение', year=2000, description='')
+        self.reviews_url = f'/api/v1/titles/{self.title.id}/reviews/'
+        token = UserTokenObtainPairSerializer.get_token(self.user)['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        # Версия токена попадает в кэш.
+        self.client.get(f'/api/v1/titles/{self.title.id}/')
+
+    def post(self, url, data):
+        """Ответ и запросы к БД без управления транзакцией"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, data)
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith(('BEGIN', 'SAVEPOINT', 'RELEASE'))
+        ]
+        return response, queries
+
+    def test_create_review(self):
+        # Первый отзыв создает строки произведения в таблицах лидеров.
+        Review.objects.create(
+            title=self.title, text='Текст', score=4,
+            author=User.objects.create(username='other', email='o@ya.ru'))
+        response, queries = self.post(
+            self.reviews_url, {'text': 'Текст', 'score': 8})
+        self.assertEqual(response.status_code, 201)
+        # Произведение, вставка отзыва и пересчет рейтинга, после коммита
+        # рейтинг и trending в таблицах лидеров.
+        self.assertEqual(len(queries), 5, queries)
+        self.title.refresh_from_db()
+        self.assertEqual(self.title.rating, 6)
+
+    def test_duplicate_review(self):
+        self.client.post(self.reviews_url, {'text': 'Текст', 'score': 8})
+        response = self.client.post(
+            self.reviews_url, {'text': 'Еще', 'score': 2})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['non_field_errors'],
+            ['Вы уже оставили отзыв на данное произведение'])
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.rating, self.title.reviews_count), (8, 1))
+
+    def test_create_comment(self):
+        review = Review.objects.create(
+            title=self.title, author=self.user, text='Текст', score=5)
+        response, queries = self.post(
+            f'{self.reviews_url}{review.id}/comments/', {'text': 'Да'})
+        self.assertEqual(response.status_code, 201)
+        # Отзыв и вставка комментария.
+        self.assertEqual(len(queries), 2, queries)
+
+    def test_missing_parent(self):
+        response = self.client.post(
+            '/api/v1/titles/0/reviews/', {'text': 'Текст', 'score': 8})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,76 @@
+import time
+
+# Этапы в порядке вывода в заголовке Server-Timing.
+STAGES = ('db', 'serialize', 'render', 'total')
+
+
+class RequestTiming:
+    """Время этапов обработки одного запроса в секундах"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.durations = dict.fromkeys(STAGES, 0.0)
+
+    def record_query(self, execute, sql, params, many, context):
+        """Обертка выполнения запросов к БД (connection.execute_wrapper)"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.durations['db'] += time.perf_counter() - started
+
+    def timed(self, stage, method):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.durations[stage] += time.perf_counter() - started
+        return wrapper
+
+    def watch_serializer(self, serializer):
+        """Замер представления, валидации и сохранения сериализатора"""
+        for name in ('to_representation', 'run_validation', 'save'):
+            setattr(serializer, name,
+                    self.timed('serialize', getattr(serializer, name)))
+
+    def start_render(self, response):
+        started = time.perf_counter()
+
+        def finish(rendered):
+            self.durations['render'] += time.perf_counter() - started
+        response.add_post_render_callback(finish)
+
+    def finish(self):
+        self.durations['total'] = time.perf_counter() - self.started
+
+    def header(self):
+        """Значение заголовка Server-Timing, длительности в мс"""
+        metrics = []
+        for stage in STAGES:
+            metric = f'{stage};dur={self.durations[stage] * 1000:.2f}'
+            if stage == 'db':
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        data = {
+            f'{stage}_ms': round(self.durations[stage] * 1000, 2)
+            for stage in STAGES
+        }
+        data['queries'] = self.queries
+        return data
+
+
+class ServerTimingMixin:
+    """Замер времени сериализаторов для ServerTimingMiddleware"""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        timing = getattr(self.request, 'server_timing', None)
+        if timing is not None:
+            timing.watch_serializer(serializer)
+        return serializer
@@ -1,6 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
+from reviews.models import Categories, Genre, TitleRanking
+
 from . import views
 
 app_name = 'api'
@@ -27,6 +29,30 @@ router_v1.register(
 )
 
 urlpatterns = [
+    # Раньше адресов жанров и категорий по слагу, иначе batch примут
+    # за слаг.
+    path('v1/titles/batch/', views.TitlesList.batch_view(),
+         name='titles-batch'),
+    path('v1/genres/batch/', views.GenreList.batch_view(),
+         name='genres-batch'),
+    path('v1/categories/batch/', views.CategoriesList.batch_view(),
+         name='categories-batch'),
+    path('v1/leaderboards/top/',
+         views.LeaderboardView.as_view(board=TitleRanking.TOP),
+         name='leaderboard-top'),
+    path('v1/leaderboards/trending/',
+         views.LeaderboardView.as_view(board=TitleRanking.TRENDING),
+         name='leaderboard-trending'),
+    path('v1/leaderboards/genres/<str:slug>/',
+         views.LeaderboardView.as_view(slug_model=Genre),
+         name='leaderboard-genre'),
+    path('v1/leaderboards/categories/<str:slug>/',
+         views.LeaderboardView.as_view(slug_model=Categories),
+         name='leaderboard-category'),
+    path('v1/leaderboards/years/<int:year>/',
+         views.LeaderboardView.as_view(),
+         name='leaderboard-year'),
+    path('v1/export/', views.ExportView.as_view(), name='export'),
     path('v1/categories/<str:slug>/', views.SlugCategoriesDel.as_view()),
     path('v1/genres/<str:slug>/', views.SlugGenreDel.as_view()),
     path(
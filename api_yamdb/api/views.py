@@ -1,23 +1,37 @@
-from api import filter, permissions, serializers
-from reviews.models import Categories, Genre, Review, Title, User
-from django.db.models import Avg
+from api import (export, filter, pagination, permissions, readers,
+                 serializers)
+from api.authentication import get_full_user
+from api.batch import BatchWriteMixin
+from api.cache import CachedResponseMixin
+from api.conditional import ConditionalGetMixin
+from api.relations import resolve_slugs
+from api.sparse import SparseQuerysetMixin
+from api.timing import ServerTimingMixin
+from reviews.models import (Categories, Comment, Genre, Review, Title,
+                            TitleRanking, User)
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, status, viewsets
+from rest_framework import filters, generics, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 
-class CreateViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
+class CreateViewSet(ServerTimingMixin, mixins.CreateModelMixin,
+                    viewsets.GenericViewSet):
     pass
 
 
-class UserTokenObtainPairView(TokenObtainPairView):
+class UserTokenObtainPairView(ServerTimingMixin, TokenObtainPairView):
     serializer_class = serializers.UserTokenObtainPairSerializer
 
 
@@ -42,9 +56,9 @@ class UserViewSet(CreateViewSet):
         )
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(ServerTimingMixin, viewsets.ModelViewSet):
     """Работа с пользователями"""
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('id')
     serializer_class = serializers.UsersSerializer
     permission_classes = (permissions.Admin,)
     filter_backends = (filters.SearchFilter,)
@@ -56,14 +70,14 @@ class UsersViewSet(viewsets.ModelViewSet):
             permission_classes=[IsAuthenticated])
     def me(self, request):
         if request.method == 'GET':
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(get_full_user(request.user))
             return Response(serializer.data)
         elif request.method == 'PATCH':
             if request.user.role == 'user' and 'role' in request.data:
-                serializer = self.get_serializer(request.user)
+                serializer = self.get_serializer(get_full_user(request.user))
                 return Response(serializer.data)
             serializer = self.get_serializer(
-                request.user,
+                User.objects.get(pk=request.user.pk),
                 data=request.data,
                 partial=True
             )
@@ -73,16 +87,35 @@ class UsersViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class TitlesList(viewsets.ModelViewSet):
+class TitlesList(ServerTimingMixin, ConditionalGetMixin, CachedResponseMixin,
+                 readers.FastReadMixin, BatchWriteMixin, SparseQuerysetMixin,
+                 viewsets.ModelViewSet):
     """Посты"""
-    queryset = Title.objects.all().annotate(Avg("reviews__score"))
+    cache_namespace = 'titles'
+    conditional_dependencies = (Genre, Categories)
+    queryset = Title.objects.order_by('id')
+    sparse_select = {'category': 'category'}
+    sparse_prefetch = {
+        'genre': Prefetch('genre', queryset=Genre.objects.order_by('id')),
+    }
+    reader_class = readers.TitleReader
     serializer_class = serializers.TitlesSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = pagination.PageOrCursorPagination
+    keyset_ordering = ('id',)
     permission_classes = (IsAuthenticatedOrReadOnly,)
     filterset_class = filter.TitlesFilters
     filter_backends = (DjangoFilterBackend,)
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    def get_queryset(self):
+        return self.load_fields(super().get_queryset())
+
+    def paginate_queryset(self, queryset):
+        """Произведения по ?ids= отдаются списком без пагинации"""
+        if filter.split_csv(self.request.query_params.get('ids', '')):
+            return None
+        return super().paginate_queryset(queryset)
+
     def get_serializer_class(self):
         """Разделение сериализаторов POST и GET"""
         if self.request.method == 'GET':
@@ -96,11 +129,14 @@ class TitlesList(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class GenreList(viewsets.ModelViewSet):
+class GenreList(ServerTimingMixin, ConditionalGetMixin, CachedResponseMixin,
+                BatchWriteMixin, viewsets.ModelViewSet):
     """Жанр"""
-    queryset = Genre.objects.all()
+    cache_namespace = 'genres'
+    batch_lookup_field = 'slug'
+    queryset = Genre.objects.order_by('id')
     serializer_class = serializers.GenreSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = pagination.CountedPagination
     permission_classes = (IsAuthenticatedOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
@@ -135,17 +171,56 @@ class SlugCategoriesDel(APIView):
         return (permissions.Admin(),)
 
 
-class CategoriesList(viewsets.ModelViewSet):
+class ExportView(APIView):
+    """Потоковая выгрузка данных.
+
+    ?output=ndjson (по умолчанию) - все файлы или перечисленные в
+    ?file=titles,review; ?output=csv&file=titles - один файл в формате
+    install_bd.
+    """
+    permission_classes = (permissions.Admin,)
+
+    def get(self, request):
+        output = request.query_params.get('output', export.NDJSON)
+        if output not in export.CONTENT_TYPES:
+            raise ValidationError(
+                {'output': [f'Допустимо: {", ".join(export.CONTENT_TYPES)}']})
+        names = filter.split_csv(request.query_params.get('file', ''))
+        unknown = [name for name in names if name not in export.EXPORT_FILES]
+        if unknown:
+            raise ValidationError(
+                {'file': [f'Нет файлов: {", ".join(unknown)}']})
+        if output == export.CSV:
+            if len(names) != 1:
+                raise ValidationError(
+                    {'file': ['Для csv укажите один файл']})
+            content = export.iter_csv(names[0])
+            filename = f'{names[0]}.csv'
+        else:
+            content = export.iter_ndjson(names)
+            filename = 'export.ndjson'
+        response = StreamingHttpResponse(
+            content, content_type=export.CONTENT_TYPES[output])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"')
+        return response
+
+
+class CategoriesList(ServerTimingMixin, ConditionalGetMixin,
+                     CachedResponseMixin, BatchWriteMixin,
+                     viewsets.ModelViewSet):
     """Категории"""
+    cache_namespace = 'categories'
+    batch_lookup_field = 'slug'
     serializer_class = serializers.CategorieSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = pagination.CountedPagination
     permission_classes = (IsAuthenticatedOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     http_method_names = ('get', 'post', 'patch', 'delete')
 
     def get_queryset(self):
-        queryset = Categories.objects.all()
+        queryset = Categories.objects.order_by('id')
         name = self.request.query_params.get('name')
         if name is not None:
             return queryset.filter(name=name)
@@ -158,35 +233,104 @@ class CategoriesList(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ServerTimingMixin, ConditionalGetMixin,
+                    readers.FastReadMixin, SparseQuerysetMixin,
+                    viewsets.ModelViewSet):
     serializer_class = serializers.ReviewSerializer
+    reader_class = readers.ReviewReader
+    sparse_select = {'author': 'author'}
+    sparse_required = ('id', 'pub_date')
     permission_classes = (IsAuthenticatedOrReadOnly,
                           permissions.IsAuthorAdminModeratorOrReadOnly)
-    pagination_class = PageNumberPagination
+    pagination_class = pagination.PageOrCursorPagination
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    @cached_property
+    def title(self):
+        """Произведение из адреса, один запрос на весь запрос к API"""
+        return get_object_or_404(
+            Title.objects.only('id'), id=self.kwargs.get('title_id'))
+
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        if self.action == 'list':
+            return self.load_fields(self.title.reviews.all())
+        # Отзыв другого произведения не найдется, отдельно проверять
+        # произведение не нужно.
+        return self.load_fields(
+            Review.objects.filter(title_id=self.kwargs.get('title_id')))
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ServerTimingMixin, ConditionalGetMixin,
+                     readers.FastReadMixin, SparseQuerysetMixin,
+                     viewsets.ModelViewSet):
     serializer_class = serializers.CommentSerializer
+    reader_class = readers.CommentReader
+    sparse_select = {'author': 'author'}
+    sparse_required = ('id', 'pub_date')
     permission_classes = (IsAuthenticatedOrReadOnly,
                           permissions.IsAuthorAdminModeratorOrReadOnly)
     http_method_names = ('get', 'post', 'patch', 'delete')
-    pagination_class = PageNumberPagination
+    pagination_class = pagination.PageOrCursorPagination
+
+    @cached_property
+    def review(self):
+        """Отзыв из адреса, один запрос на весь запрос к API"""
+        return get_object_or_404(
+            Review.objects.only('id'), id=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'))
+
+    def get_queryset(self):
+        if self.action == 'list':
+            return self.load_fields(self.review.comments.all())
+        return self.load_fields(Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+        ))
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'),
-                                   title__id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.review)
+
+
+class LeaderboardView(ServerTimingMixin, generics.ListAPIView):
+    """Таблица лидеров: первые ?limit= мест (по умолчанию 10).
+
+    board - top или trending; для таблиц жанра и категории задается
+    slug_model и слаг в адресе, для таблицы года - год в адресе.
+    """
+    board = None
+    slug_model = None
+    serializer_class = serializers.LeaderboardSerializer
+    permission_classes = (AllowAny,)
+    pagination_class = None
+
+    def get_board(self):
+        if self.slug_model is None:
+            return self.board or TitleRanking.for_year(self.kwargs['year'])
+        slug = self.kwargs['slug']
+        ids = resolve_slugs(self.slug_model, [slug])
+        if slug not in ids:
+            raise NotFound
+        if self.slug_model is Genre:
+            return TitleRanking.for_genre(ids[slug])
+        return TitleRanking.for_category(ids[slug])
+
+    def get_limit(self):
+        maximum = settings.LEADERBOARDS['MAX_SIZE']
+        try:
+            limit = int(self.request.query_params.get('limit', '10'))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= maximum:
+            raise ValidationError(
+                {'limit': [f'Целое число от 1 до {maximum}']})
+        return limit
 
     def get_queryset(self):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'),
-                                   title__id=self.kwargs.get('title_id'))
-        return review.comments.all()
+        return TitleRanking.objects.board(self.get_board()).select_related(
+            'title').only(
+                'score', 'reviews_count', 'title__id', 'title__name',
+                'title__year', 'title__rating',
+        )[:self.get_limit()]
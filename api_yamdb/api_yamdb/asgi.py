@@ -3,14 +3,105 @@ ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
-For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+Django 2.2 has no async request handling, so the ASGI application wraps the
+WSGI handler: request bodies are received on the event loop, Django runs in a
+bounded thread pool (``ASGI_THREADS``) and responses up to
+``ASGI_RESPONSE_BUFFER`` bytes are sent back from the event loop, so slow
+clients do not hold a worker thread.
+
+Run it with ``SERVER_MODE=asgi gunicorn -c gunicorn.conf.py``.
 """
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
 
-from django.core.asgi import get_asgi_application
+from asgiref.wsgi import WsgiToAsgiInstance
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+
+class ThreadPoolWsgiToAsgi:
+    """ASGI-обертка над WSGI-приложением с ограниченным пулом потоков"""
+
+    def __init__(self, wsgi_application, max_threads, buffer_size):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_threads, thread_name_prefix='asgi')
+        self.buffer_size = buffer_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Unsupported ASGI scope {scope["type"]}')
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+            loop = asyncio.get_event_loop()
+            start, chunks, streamed = await loop.run_in_executor(
+                self.executor, self.run_wsgi_app, loop, scope, body, send)
+        if streamed:
+            await send({'type': 'http.response.body'})
+            return
+        await send(start)
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def run_wsgi_app(self, loop, scope, body, send):
+        """Выполняется в пуле: ответ копится в буфере, а если он больше
+        ``buffer_size`` (например, потоковая выгрузка), уходит клиенту
+        частями прямо из потока"""
+        instance = WsgiToAsgiInstance(self.wsgi_application)
+        instance.scope = scope
+        environ = instance.build_environ(scope, body)
+
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        chunks, size, streamed = [], 0, False
+        result = self.wsgi_application(environ, instance.start_response)
+        try:
+            for chunk in result:
+                if streamed:
+                    send_sync({'type': 'http.response.body', 'body': chunk,
+                               'more_body': True})
+                    continue
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > self.buffer_size:
+                    streamed = True
+                    send_sync(instance.response_start)
+                    send_sync({'type': 'http.response.body',
+                               'body': b''.join(chunks), 'more_body': True})
+                    chunks = []
+        finally:
+            # Django закрывает соединения с БД по сигналу request_finished.
+            if hasattr(result, 'close'):
+                result.close()
+        return instance.response_start, chunks, streamed
+
+
+application = ThreadPoolWsgiToAsgi(
+    get_wsgi_application(),
+    max_threads=int(os.getenv('ASGI_THREADS', default=10)),
+    buffer_size=int(os.getenv('ASGI_RESPONSE_BUFFER', default=1024 * 1024)),
+)
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeoutError(Exception):
+    """Свободное соединение не появилось за время ожидания"""
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений.
+
+    Держит до ``max_size`` соединений, сверх них открывает до ``overflow``
+    временных, которые закрываются при возврате. Если все заняты, ждет
+    освобождения не дольше ``timeout`` секунд. Соединения старше
+    ``recycle`` секунд переоткрываются, а ``check`` проверяет свободное
+    соединение перед выдачей.
+    """
+
+    def __init__(self, connect, max_size=10, overflow=0, timeout=5.0,
+                 recycle=None, check=None, reset=None, close=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.overflow = overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.check = check
+        self.reset = reset
+        self.close_connection = close or (lambda conn: conn.close())
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.created_at = {}
+        self.size = 0
+        self.in_use = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+
+    def acquire(self):
+        while True:
+            connection = self._take()
+            if connection is None:
+                return self._open()
+            if self.check is None or self.check(connection):
+                return connection
+            self.release(connection, discard=True)
+
+    def release(self, connection, discard=False):
+        if not discard and self.reset is not None:
+            discard = not self.reset(connection)
+        with self.condition:
+            self.in_use -= 1
+            if (discard or self.size > self.max_size
+                    or self._expired(connection)):
+                self._forget(connection)
+            else:
+                self.idle.append(connection)
+                connection = None
+            self.condition.notify()
+        if connection is not None:
+            self._close(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'overflow': self.overflow,
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.in_use,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'discarded': self.discarded,
+            }
+
+    def close_all(self):
+        with self.condition:
+            idle, self.idle = list(self.idle), deque()
+            for connection in idle:
+                self._forget(connection)
+        for connection in idle:
+            self._close(connection)
+
+    def _take(self):
+        """Свободное соединение или None, если можно открыть новое"""
+        expired = []
+        started = None
+        try:
+            with self.condition:
+                while True:
+                    while self.idle:
+                        connection = self.idle.pop()
+                        if self._expired(connection):
+                            self._forget(connection)
+                            expired.append(connection)
+                            continue
+                        self.in_use += 1
+                        return connection
+                    if self.size < self.max_size + self.overflow:
+                        self.size += 1
+                        self.in_use += 1
+                        return None
+                    now = time.monotonic()
+                    if started is None:
+                        started = now
+                        self.waits += 1
+                    remaining = started + self.timeout - now
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeoutError(
+                            f'Нет свободного соединения за {self.timeout} с')
+                    self.condition.wait(remaining)
+        finally:
+            if started is not None:
+                with self.condition:
+                    self.wait_time += time.monotonic() - started
+            for connection in expired:
+                self._close(connection)
+
+    def _open(self):
+        try:
+            connection = self.connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.in_use -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.created += 1
+            self.created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _expired(self, connection):
+        if self.recycle is None:
+            return False
+        created = self.created_at.get(id(connection), 0)
+        return time.monotonic() - created > self.recycle
+
+    def _forget(self, connection):
+        self.size -= 1
+        self.discarded += 1
+        self.created_at.pop(id(connection), None)
+
+    def _close(self, connection):
+        try:
+            self.close_connection(connection)
+        except Exception:
+            pass
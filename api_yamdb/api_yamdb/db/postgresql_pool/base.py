@@ -0,0 +1,130 @@
+"""
+PostgreSQL с повторным использованием соединений.
+
+Включается через ``ENGINE = 'api_yamdb.db.postgresql_pool'``.
+
+Если ``DATABASES[alias]['POOL']['MAX_SIZE']`` больше нуля, соединения
+берутся из пула процесса при первом запросе к БД и возвращаются в него в
+конце HTTP-запроса, CONN_MAX_AGE при этом не используется. Иначе
+соединения живут CONN_MAX_AGE секунд, как у стандартного бэкенда.
+
+С ``CONN_HEALTH_CHECKS`` соединение проверяется перед выдачей из пула,
+а постоянное — перед первым использованием в очередном запросе.
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from api_yamdb.db.pool import ConnectionPool, PoolTimeoutError
+
+Database = base.Database
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool_stats():
+    """Состояние пулов текущего процесса по алиасам БД"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+def check_connection(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Database.Error:
+        return False
+    return True
+
+
+def reset_connection(connection):
+    """Откат незавершенной транзакции перед возвратом в пул"""
+    if connection.closed:
+        return False
+    try:
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_checks = self.settings_dict.get(
+            'CONN_HEALTH_CHECKS', False)
+        self.pooled = self.settings_dict.get('POOL', {}).get('MAX_SIZE', 0) > 0
+        self.pool = None
+        self.health_check_done = False
+
+    def get_pool(self, conn_params):
+        with _pools_lock:
+            pool = _pools.get(self.alias)
+            if pool is None or pool.pid != os.getpid():
+                # После fork соединения родителя использовать нельзя.
+                options = self.settings_dict.get('POOL', {})
+                _pools[self.alias] = ConnectionPool(
+                    lambda: self.open_connection(conn_params),
+                    max_size=options['MAX_SIZE'],
+                    overflow=options.get('OVERFLOW', 0),
+                    timeout=options.get('TIMEOUT', 5.0),
+                    recycle=options.get('RECYCLE'),
+                    check=check_connection if self.health_checks else None,
+                    reset=reset_connection,
+                )
+            return _pools[self.alias]
+
+    def open_connection(self, conn_params):
+        return super().get_new_connection(conn_params)
+
+    def get_new_connection(self, conn_params):
+        if not self.pooled:
+            return super().get_new_connection(conn_params)
+        self.pool = self.get_pool(conn_params)
+        try:
+            connection = self.pool.acquire()
+        except PoolTimeoutError as error:
+            raise Database.OperationalError(str(error)) from error
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if (isolation_level is not None
+                and connection.isolation_level != isolation_level):
+            connection.set_session(isolation_level=isolation_level)
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        if (self.health_checks and not self.health_check_done
+                and self.connection is not None
+                and not self.in_atomic_block):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    def _close(self):
+        if self.connection is None or not self.pooled:
+            return super()._close()
+        self.pool.release(self.connection)
+        return None
+
+    def close_if_unusable_or_obsolete(self):
+        """Граница HTTP-запроса: возврат соединения в пул или проверка
+        постоянного соединения при следующем использовании"""
+        self.health_check_done = False
+        if not self.pooled:
+            super().close_if_unusable_or_obsolete()
+        elif self.connection is not None and not self.in_atomic_block:
+            self.close()
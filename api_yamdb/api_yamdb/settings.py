@@ -29,6 +29,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,10 +72,45 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Секунды жизни соединения потока между запросами.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # Для DB_ENGINE=api_yamdb.db.postgresql_pool: проверка соединения
+        # перед использованием и пул процесса (MAX_SIZE=0 его отключает).
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS',
+                                        default='1') == '1',
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'OVERFLOW': int(os.getenv('DB_POOL_OVERFLOW', default=5)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=5)),
+            'RECYCLE': int(os.getenv('DB_POOL_RECYCLE', default=1800)),
+        },
+    }
+}
+
+
+# Cache
+# Для общего кэша между воркерами укажите Redis-совместимый бэкенд,
+# например CACHE_BACKEND=django_redis.cache.RedisCache
+# и CACHE_LOCATION=redis://redis:6379/1.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
     }
 }
 
+# Поколения api.cache сдвигаются только в кэше воркера, обработавшего
+# запись. С кэшем процесса остальные воркеры не узнают об изменениях,
+# поэтому кэши, построенные на поколениях, по умолчанию выключены.
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
 
 # Password validation
 
@@ -123,12 +161,122 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.ApiPagination',
     'PAGE_SIZE': 5,
 }
 
+# Стратегия подсчета записей в пагинации: exact, cached или estimate.
+PAGINATION_COUNT = {
+    'STRATEGY': os.getenv('PAGINATION_COUNT_STRATEGY', default='exact'),
+    'CACHE_TIMEOUT': int(os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT',
+                                   default=60)),
+    'ESTIMATE_THRESHOLD': int(os.getenv('PAGINATION_COUNT_ESTIMATE_THRESHOLD',
+                                        default=100000)),
+}
+
+# Кэш ответов справочников и произведений (api.cache.CachedResponseMixin).
+# По умолчанию включен только с общим кэшем (SHARED_CACHE).
+API_RESPONSE_CACHE = {
+    'ENABLED': os.getenv(
+        'API_RESPONSE_CACHE', default='1' if SHARED_CACHE else '0') == '1',
+    'TIMEOUT': int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', default=300)),
+}
+
+# ETag и Last-Modified для списков и объектов
+# (api.conditional.ConditionalGetMixin), агрегаты updated_at кэшируются
+# до изменения модели. ETag строится на поколениях, поэтому по умолчанию
+# включен только с общим кэшем (SHARED_CACHE).
+CONDITIONAL_GET = {
+    'ENABLED': os.getenv(
+        'CONDITIONAL_GET', default='1' if SHARED_CACHE else '0') == '1',
+    'CACHE_TIMEOUT': int(os.getenv('CONDITIONAL_GET_CACHE_TIMEOUT',
+                                   default=300)),
+}
+
+# Максимум объектов в одном запросе к batch/ (api.batch.BatchWriteMixin).
+BATCH_WRITE = {
+    'MAX_ITEMS': int(os.getenv('BATCH_WRITE_MAX_ITEMS', default=1000)),
+}
+
+# Сколько секунд живет кэш слаг -> id жанров и категорий в памяти
+# процесса (api.relations.resolve_slugs). Без общего кэша (SHARED_CACHE)
+# он сбрасывается в начале каждого запроса.
+SLUG_CACHE = {
+    'TIMEOUT': int(os.getenv('SLUG_CACHE_TIMEOUT', default=300)),
+}
+
+# Сколько строк за раз читается из курсора при выгрузке
+# (api.export, export_bd и api/v1/export/).
+EXPORT = {
+    'CHUNK_SIZE': int(os.getenv('EXPORT_CHUNK_SIZE', default=2000)),
+}
+
+# Таблицы лидеров (reviews.models.TitleRanking). INCREMENTAL=0 оставляет
+# пересчет только команде refresh_leaderboards; trending - число отзывов
+# за TRENDING_DAYS дней, окно сдвигает та же команда.
+LEADERBOARDS = {
+    'INCREMENTAL': os.getenv('LEADERBOARDS_INCREMENTAL', default='1') == '1',
+    'TRENDING_DAYS': int(os.getenv('LEADERBOARDS_TRENDING_DAYS', default=7)),
+    'MAX_SIZE': int(os.getenv('LEADERBOARDS_MAX_SIZE', default=100)),
+}
+
+# Списки произведений, отзывов и комментариев из строк values()
+# (api.readers) вместо сериализатора на каждый объект.
+API_FAST_READ = os.getenv('API_FAST_READ', default='1') == '1'
+
+# Сколько секунд кэшируются версия токенов и модель пользователя
+# для api.authentication.StatelessJWTAuthentication. Без общего кэша
+# (SHARED_CACHE) версия читается из БД на каждый запрос.
+STATELESS_JWT = {
+    'CACHE_TIMEOUT': int(os.getenv('STATELESS_JWT_CACHE_TIMEOUT',
+                                   default=30)),
+}
+
+# Заголовок Server-Timing и строка в логе api.timing для доли запросов
+# (api.middleware.ServerTimingMiddleware).
+SERVER_TIMING = {
+    'ENABLED': os.getenv('SERVER_TIMING', default='0') == '1',
+    'SAMPLE_RATE': float(os.getenv('SERVER_TIMING_SAMPLE_RATE',
+                                   default=0.01)),
+}
+
+# Метрики Prometheus на /metrics (api.middleware.MetricsMiddleware).
+# При нескольких воркерах gunicorn задайте общий каталог в переменной
+# окружения PROMETHEUS_MULTIPROC_DIR.
+METRICS = {
+    'ENABLED': os.getenv('METRICS', default='1') == '1',
+}
+
+# Сжатие ответов brotli или gzip (api.middleware.CompressionMiddleware).
+COMPRESSION = {
+    'ENABLED': os.getenv('COMPRESSION', default='1') == '1',
+    'MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', default=1024)),
+    'GZIP_LEVEL': int(os.getenv('COMPRESSION_GZIP_LEVEL', default=6)),
+    'BROTLI_QUALITY': int(os.getenv('COMPRESSION_BROTLI_QUALITY',
+                                    default=4)),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'AUTH_HEADER_TYPES': ('Bearer',),
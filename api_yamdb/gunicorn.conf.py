@@ -0,0 +1,33 @@
+# Настройки gunicorn. SERVER_MODE=wsgi (по умолчанию) запускает
+# синхронные воркеры, SERVER_MODE=asgi — воркеры uvicorn поверх
+# api_yamdb.asgi с пулом из ASGI_THREADS потоков на процесс.
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1))
+
+if os.getenv('SERVER_MODE', default='wsgi') == 'asgi':
+    wsgi_app = 'api_yamdb.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'api_yamdb.wsgi:application'
+    worker_class = 'sync'
+
+
+def on_starting(server):
+    """Очистка файлов метрик прошлого запуска (см. api.metrics)"""
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.db'):
+                os.remove(os.path.join(directory, name))
+
+
+def child_exit(server, worker):
+    """Метрики завершившегося воркера больше не входят в live-гейджи"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,9 +1,10 @@
 from django.contrib import admin
 
-from .models import Categories, Comment, Genre, Title, User
+from .models import Categories, Comment, Genre, OutgoingEmail, Title, User
 
 admin.site.register(User)
 admin.site.register(Title)
 admin.site.register(Genre)
 admin.site.register(Categories)
 admin.site.register(Comment)
+admin.site.register(OutgoingEmail)
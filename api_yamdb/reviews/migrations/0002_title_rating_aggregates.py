@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:26
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    Title.objects.update(rating=None)
+    aggregates = (
+        Review.objects.order_by().values('title')
+        .annotate(total=Count('pk'), score_sum=Sum('score'))
+    )
+    for row in aggregates:
+        Title.objects.filter(pk=row['title']).update(
+            reviews_count=row['total'],
+            score_sum=row['score_sum'],
+            rating=row['score_sum'] // row['total'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='rating',
+            field=models.IntegerField(blank=True, default=None, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
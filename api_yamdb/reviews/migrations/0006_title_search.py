@@ -0,0 +1,62 @@
+from django.db import migrations
+
+# Колонка search_vector поддерживается триггером и есть только в
+# PostgreSQL, поэтому в модели её нет, а миграция зависит от СУБД.
+FORWARD_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'ALTER TABLE reviews_title ADD COLUMN search_vector tsvector',
+    """
+    CREATE FUNCTION reviews_title_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A')
+            || setweight(
+                to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER reviews_title_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description ON reviews_title
+    FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector()
+    """,
+    """
+    UPDATE reviews_title SET search_vector =
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    """,
+    'CREATE INDEX title_search_vector_idx ON reviews_title '
+    'USING gin (search_vector)',
+    'CREATE INDEX title_name_trgm_idx ON reviews_title '
+    'USING gin (UPPER(name::text) gin_trgm_ops)',
+)
+
+BACKWARD_SQL = (
+    'DROP INDEX IF EXISTS title_name_trgm_idx',
+    'DROP INDEX IF EXISTS title_search_vector_idx',
+    'DROP TRIGGER IF EXISTS reviews_title_search_vector_update '
+    'ON reviews_title',
+    'DROP FUNCTION IF EXISTS reviews_title_search_vector()',
+    'ALTER TABLE reviews_title DROP COLUMN IF EXISTS search_vector',
+)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_user_token_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD_SQL), run(BACKWARD_SQL)),
+    ]
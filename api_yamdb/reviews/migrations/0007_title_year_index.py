@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.IntegerField(db_index=True, verbose_name='Год'),
+        ),
+    ]
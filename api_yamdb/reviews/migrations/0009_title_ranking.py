@@ -0,0 +1,77 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:06
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_rankings(apps, schema_editor):
+    """Таблицы лидеров по уже посчитанным рейтингам и свежим отзывам"""
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    genres = {}
+    for title_id, genre_id in Title.genre.through.objects.values_list(
+            'title_id', 'genre_id'):
+        genres.setdefault(title_id, []).append(genre_id)
+    rows = []
+    for title_id, rating, reviews_count, category_id, year in (
+        Title.objects.filter(rating__isnull=False).values_list(
+            'id', 'rating', 'reviews_count', 'category_id', 'year')
+    ):
+        boards = ['top', f'year:{year}']
+        if category_id is not None:
+            boards.append(f'category:{category_id}')
+        boards += [f'genre:{genre_id}' for genre_id in genres.get(title_id, ())]
+        rows += [
+            TitleRanking(board=board, title_id=title_id, score=rating,
+                         reviews_count=reviews_count)
+            for board in boards
+        ]
+    since = timezone.now() - timedelta(
+        days=settings.LEADERBOARDS['TRENDING_DAYS'])
+    rows += [
+        TitleRanking(board='trending', title_id=title_id, score=total)
+        for title_id, total in Review.objects.filter(
+            pub_date__gte=since,
+        ).order_by().values('title').annotate(
+            total=Count('pk')).values_list('title', 'total')
+    ]
+    TitleRanking.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=64, verbose_name='Таблица')),
+                ('score', models.IntegerField(verbose_name='Рейтинг или число свежих отзывов')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.Title')),
+            ],
+            options={
+                'verbose_name': 'Место в таблице лидеров',
+                'verbose_name_plural': 'Таблицы лидеров',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['board', '-score', '-reviews_count', 'title'], name='ranking_board_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('board', 'title'), name='unique_board_title'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
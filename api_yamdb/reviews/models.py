@@ -1,9 +1,15 @@
 import random
 import string
+from datetime import timedelta
+from itertools import islice
 
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Case, Count, F, OuterRef, Subquery, Sum, Value,
+                              When)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
 class CustomUserManager(UserManager):
@@ -41,9 +47,39 @@ class User(AbstractUser):
         blank=True,
         null=True,
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+    )
     REQUIRED_FIELDS = ['email']
+    # Поля, которые попадают в токен: их изменение отзывает токены.
+    TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
     objects = CustomUserManager()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance.get_claim_values()
+        return instance
+
+    def get_claim_values(self):
+        return tuple(
+            self.__dict__.get(field) for field in self.TOKEN_CLAIM_FIELDS
+        )
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_claims', None)
+        if loaded is not None and loaded != self.get_claim_values():
+            self.token_version += 1
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.get_claim_values()
+
+    def revoke_tokens(self):
+        """Отзыв всех выданных пользователю токенов"""
+        self.token_version = F('token_version') + 1
+        self.save(update_fields=['token_version'])
+        self.refresh_from_db(fields=['token_version'])
+
     @property
     def is_moderator(self):
         return self.role == self.MODERATOR
@@ -60,6 +96,8 @@ class Genre (models.Model):
                             unique=True,
                             verbose_name='slugs',
                             )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True,
+                                      verbose_name='Дата изменения')
 
     class Meta:
         constraints = [
@@ -73,11 +111,64 @@ class Genre (models.Model):
         return self.slug
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def apply_review_delta(self, title_id, score_delta, count_delta):
+        """Инкрементальный пересчет рейтинга одним UPDATE"""
+        return self.filter(pk=title_id).update(
+            updated_at=timezone.now(),
+            score_sum=F('score_sum') + score_delta,
+            reviews_count=F('reviews_count') + count_delta,
+            rating=Case(
+                When(reviews_count=-count_delta, then=Value(None)),
+                default=(
+                    (F('score_sum') + score_delta)
+                    / (F('reviews_count') + count_delta)
+                ),
+                output_field=models.IntegerField(),
+            ),
+        )
+
+    def rebuild_ratings(self):
+        """Полный пересчет рейтинга по таблице отзывов"""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        self.update(
+            reviews_count=Coalesce(Subquery(
+                reviews.annotate(total=Count('pk')).values('total'),
+                output_field=models.IntegerField(),
+            ), 0),
+            score_sum=Coalesce(Subquery(
+                reviews.annotate(total=Sum('score')).values('total'),
+                output_field=models.IntegerField(),
+            ), 0),
+        )
+        return self.update(updated_at=timezone.now(), rating=Case(
+            When(reviews_count=0, then=Value(None)),
+            default=F('score_sum') / F('reviews_count'),
+            output_field=models.IntegerField(),
+        ))
+
+
 class Title(models.Model):
     """Произведения, к которым пишут отзывы"""
     name = models.CharField(max_length=200, verbose_name='Название')
-    year = models.IntegerField(verbose_name='Год')
-    rating = models.IntegerField(default=0, verbose_name='Рейтинг')
+    year = models.IntegerField(verbose_name='Год', db_index=True)
+    rating = models.IntegerField(
+        null=True,
+        blank=True,
+        default=None,
+        verbose_name='Рейтинг',
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов',
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок',
+    )
     description = models.TextField(verbose_name='Описание')
     genre = models.ManyToManyField(
         Genre,
@@ -95,6 +186,10 @@ class Title(models.Model):
         verbose_name='Категории',
         help_text='Категории отзыва',
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True,
+                                      verbose_name='Дата изменения')
+
+    objects = TitleQuerySet.as_manager()
 
     def __str__(self):
         return self.name[:15]
@@ -107,6 +202,8 @@ class Categories (models.Model):
                             unique=True,
                             verbose_name='slugs',
                             )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True,
+                                      verbose_name='Дата изменения')
 
     class Meta:
         constraints = [
@@ -136,11 +233,19 @@ class Review(models.Model):
                                     db_index=True)
     title = models.ForeignKey(Title, on_delete=models.CASCADE,
                               related_name='reviews')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
 
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ('-pub_date', )
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_keyset_idx',
+            ),
+        ]
 
         constraints = [
             models.UniqueConstraint(
@@ -149,6 +254,13 @@ class Review(models.Model):
             )
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        instance._loaded_title_id = instance.__dict__.get('title_id')
+        return instance
+
     def __str__(self):
         return f'{self.title}, {self.score}, {self.author}'
 
@@ -161,11 +273,216 @@ class Comment(models.Model):
     text = models.TextField(verbose_name='Текст комментария')
     pub_date = models.DateTimeField(verbose_name='Дата комментария',
                                     auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-pub_date', )
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_keyset_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.author}, {self.pub_date}: {self.text}'
+
+
+class TitleRankingQuerySet(models.QuerySet):
+
+    def board(self, board):
+        """Строки таблицы лидеров в порядке мест"""
+        return self.filter(board=board).order_by(
+            '-score', '-reviews_count', 'title_id')
+
+    def rating_rows(self, titles):
+        """Строки таблиц по рейтингу для произведений с оценками.
+
+        titles - кортежи (id, rating, reviews_count, category_id, year).
+        """
+        genres = {}
+        for title_id, genre_id in Title.genre.through.objects.filter(
+            title_id__in=[title[0] for title in titles]
+        ).values_list('title_id', 'genre_id'):
+            genres.setdefault(title_id, []).append(genre_id)
+        rows = []
+        for title_id, rating, reviews_count, category_id, year in titles:
+            boards = [TitleRanking.TOP, TitleRanking.for_year(year)]
+            if category_id is not None:
+                boards.append(TitleRanking.for_category(category_id))
+            boards += [
+                TitleRanking.for_genre(genre_id)
+                for genre_id in genres.get(title_id, ())
+            ]
+            rows += [
+                self.model(board=board, title_id=title_id, score=rating,
+                           reviews_count=reviews_count)
+                for board in boards
+            ]
+        return rows
+
+    def rated_titles(self):
+        return Title.objects.filter(rating__isnull=False).order_by(
+            'pk').values_list(
+                'id', 'rating', 'reviews_count', 'category_id', 'year')
+
+    def sync_titles(self, title_ids):
+        """Строки произведений во всех таблицах, кроме trending"""
+        titles = list(self.rated_titles().filter(pk__in=title_ids))
+        with transaction.atomic():
+            self.filter(title_id__in=title_ids).exclude(
+                board=TitleRanking.TRENDING).delete()
+            self.bulk_create(self.rating_rows(titles), ignore_conflicts=True)
+
+    def refresh_scores(self, title_id):
+        """Новый рейтинг произведения в его строках одним UPDATE.
+
+        Строки произведения без них (первый отзыв) создаются заново.
+        """
+        title = Title.objects.filter(pk=title_id)
+        updated = self.filter(title_id=title_id).exclude(
+            board=TitleRanking.TRENDING).update(
+                score=Subquery(title.values('rating')),
+                reviews_count=Subquery(title.values('reviews_count')),
+        )
+        if not updated:
+            self.sync_titles([title_id])
+
+    def rebuild(self, batch_size=1000):
+        """Полный пересчет таблиц по рейтингу"""
+        with transaction.atomic():
+            self.exclude(board=TitleRanking.TRENDING).delete()
+            titles = self.rated_titles().iterator(chunk_size=batch_size)
+            while True:
+                batch = list(islice(titles, batch_size))
+                if not batch:
+                    return
+                self.bulk_create(self.rating_rows(batch))
+
+    def rebuild_trending(self, days):
+        """Пересчет trending: число отзывов за последние days дней"""
+        counts = Review.objects.filter(
+            pub_date__gte=timezone.now() - timedelta(days=days),
+        ).order_by().values('title').annotate(
+            total=Count('pk')).values_list('title', 'total')
+        with transaction.atomic():
+            self.filter(board=TitleRanking.TRENDING).delete()
+            self.bulk_create(
+                (self.model(board=TitleRanking.TRENDING, title_id=title_id,
+                            score=total)
+                 for title_id, total in counts.iterator()),
+                batch_size=1000,
+            )
+
+    def add_trending(self, title_id, delta):
+        """Сдвиг числа свежих отзывов произведения в trending.
+
+        Гонка двух первых отзывов может потерять единицу, её исправит
+        следующий rebuild_trending.
+        """
+        trending = self.filter(board=TitleRanking.TRENDING, title_id=title_id)
+        updated = trending.update(score=F('score') + delta)
+        if delta > 0 and not updated:
+            self.bulk_create([self.model(
+                board=TitleRanking.TRENDING, title_id=title_id, score=delta,
+            )], ignore_conflicts=True)
+        elif delta < 0:
+            trending.filter(score__lte=0).delete()
+
+
+class TitleRanking(models.Model):
+    """Место произведения в таблице лидеров.
+
+    Таблица - значение board: top, trending, genre:<id>, category:<id>
+    или year:<год>. Строки поддерживают сигналы reviews.signals и команда
+    refresh_leaderboards, чтение таблицы - проход по индексу.
+    """
+    TOP = 'top'
+    TRENDING = 'trending'
+
+    board = models.CharField(max_length=64, verbose_name='Таблица')
+    title = models.ForeignKey(Title, on_delete=models.CASCADE,
+                              related_name='rankings')
+    score = models.IntegerField(
+        verbose_name='Рейтинг или число свежих отзывов')
+    reviews_count = models.PositiveIntegerField(
+        default=0, verbose_name='Количество отзывов')
+
+    objects = TitleRankingQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Место в таблице лидеров'
+        verbose_name_plural = 'Таблицы лидеров'
+        indexes = [
+            models.Index(
+                fields=['board', '-score', '-reviews_count', 'title'],
+                name='ranking_board_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'title'],
+                name='unique_board_title'
+            )
+        ]
+
+    @staticmethod
+    def for_genre(genre_id):
+        return f'genre:{genre_id}'
+
+    @staticmethod
+    def for_category(category_id):
+        return f'category:{category_id}'
+
+    @staticmethod
+    def for_year(year):
+        return f'year:{year}'
+
+    def __str__(self):
+        return f'{self.board}: {self.title_id}, {self.score}'
+
+
+class OutgoingEmailQuerySet(models.QuerySet):
+
+    def pending(self, max_attempts):
+        """Неотправленные письма, срок очередной попытки которых наступил"""
+        return self.filter(
+            sent_at__isnull=True,
+            send_after__lte=timezone.now(),
+            attempts__lt=max_attempts,
+        ).order_by('send_after', 'id')
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку"""
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.CharField(max_length=254, verbose_name='Отправитель')
+    recipients = models.TextField(verbose_name='Получатели через запятую')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Дата создания')
+    send_after = models.DateTimeField(default=timezone.now,
+                                      verbose_name='Отправить после')
+    sent_at = models.DateTimeField(null=True, blank=True,
+                                   verbose_name='Дата отправки')
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток отправки')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+
+    objects = OutgoingEmailQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'send_after'],
+                name='outgoing_email_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipients}: {self.subject}'
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Categories, Genre, Review, Title, TitleRanking
+
+
+def sync_rankings(*title_ids):
+    """Строки таблиц лидеров по рейтингу после коммита"""
+    if settings.LEADERBOARDS['INCREMENTAL']:
+        transaction.on_commit(
+            lambda: TitleRanking.objects.sync_titles(title_ids))
+
+
+def refresh_rankings(title_id):
+    """Новый рейтинг в таблицах лидеров после коммита"""
+    if settings.LEADERBOARDS['INCREMENTAL']:
+        transaction.on_commit(
+            lambda: TitleRanking.objects.refresh_scores(title_id))
+
+
+def add_trending(title_id, pub_date, delta):
+    """Отзыв из окна trending сдвигает число свежих отзывов"""
+    options = settings.LEADERBOARDS
+    since = timezone.now() - timedelta(days=options['TRENDING_DAYS'])
+    if options['INCREMENTAL'] and pub_date is not None and pub_date >= since:
+        transaction.on_commit(
+            lambda: TitleRanking.objects.add_trending(title_id, delta))
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    """Обновление рейтинга произведения при создании и изменении отзыва"""
+    if raw:
+        return
+    if created:
+        Title.objects.apply_review_delta(instance.title_id, instance.score, 1)
+        refresh_rankings(instance.title_id)
+        add_trending(instance.title_id, instance.pub_date, 1)
+    else:
+        old_title_id = getattr(instance, '_loaded_title_id', None)
+        old_score = getattr(instance, '_loaded_score', None)
+        if old_title_id is None or old_score is None:
+            Title.objects.filter(pk=instance.title_id).rebuild_ratings()
+            sync_rankings(instance.title_id)
+        elif old_title_id != instance.title_id:
+            Title.objects.apply_review_delta(old_title_id, -old_score, -1)
+            Title.objects.apply_review_delta(
+                instance.title_id, instance.score, 1)
+            sync_rankings(old_title_id, instance.title_id)
+            add_trending(old_title_id, instance.pub_date, -1)
+            add_trending(instance.title_id, instance.pub_date, 1)
+        elif old_score != instance.score:
+            Title.objects.apply_review_delta(
+                instance.title_id, instance.score - old_score, 0)
+            refresh_rankings(instance.title_id)
+    instance._loaded_score = instance.score
+    instance._loaded_title_id = instance.title_id
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Обновление рейтинга произведения при удалении отзыва"""
+    score = getattr(instance, '_loaded_score', None) or instance.score
+    Title.objects.apply_review_delta(instance.title_id, -score, -1)
+    sync_rankings(instance.title_id)
+    add_trending(instance.title_id, instance.pub_date, -1)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_on_genre_change(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    """Смена жанров меняет дату изменения произведений"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        titles = Title.objects.filter(pk=instance.pk)
+    elif pk_set is not None:
+        titles = Title.objects.filter(pk__in=pk_set)
+    else:
+        titles = Title.objects.filter(genre=instance)
+    titles.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Title)
+def sync_rankings_on_title_save(sender, instance, created, raw=False,
+                                **kwargs):
+    """Год и категория произведения задают его таблицы лидеров"""
+    if not created and not raw:
+        sync_rankings(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def sync_rankings_on_genre_change(sender, instance, action, reverse, pk_set,
+                                  **kwargs):
+    """Смена жанров переносит произведения между таблицами жанров"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            sync_rankings(instance.pk)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        sync_rankings(*pk_set)
+    elif action == 'pre_clear':
+        sync_rankings(*Title.objects.filter(
+            genre=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Categories)
+def delete_board(sender, instance, **kwargs):
+    """Таблица удаленного жанра или категории"""
+    if sender is Genre:
+        board = TitleRanking.for_genre(instance.pk)
+    else:
+        board = TitleRanking.for_category(instance.pk)
+    TitleRanking.objects.filter(board=board).delete()